@@ -0,0 +1,317 @@
+"""
+End-to-end benchmark of the MCP server against local upstream stubs.
+
+Starts benchmarks/stubs.py (fake GitHub, Azure AD, Log Analytics, Azure
+OpenAI, Azure Vision, web pages and PostgreSQL) and `python server.py`
+pointed at it, then, for each tool of the workload, runs --concurrency MCP
+SSE sessions calling that tool for --duration seconds, and finally a mixed
+phase calling the tools at random in proportion to their weights.
+
+Reported per tool: calls, throughput, p50/p95/p99 latency, errors, and the
+CPU use and peak RSS of the server processes (read from /proc, Linux only).
+Results are written to benchmarks/results/<git sha>.json; --compare prints
+the change against a previous result and exits with 1 on a regression.
+
+Usage:
+    python benchmarks/bench_e2e.py [--tools get_commit_diff read_db ...] [--concurrency 8] [--duration 10]
+                                   [--latency-ms 20] [--workers 1] [--json out.json] [--compare old.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+from bench_scaleout import free_port_block
+from stubs import environment
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+# Distinct argument values per tool, so memoized tools see a realistic mix of hits and misses
+DISTINCT = 50
+
+
+def workload(stub_url: str) -> dict:
+    """Tool name -> (weight in the mixed phase, function building random arguments)."""
+    repo = {"owner": "octo", "repo": "demo"}
+    return {
+        "get_github_file_folder": (10, lambda rng: {**repo, "path": f"src/module_{rng.randrange(DISTINCT)}.py"}),
+        "get_file_structure": (5, lambda rng: {**repo, "branch": f"branch-{rng.randrange(DISTINCT)}"}),
+        "get_commit_history": (5, lambda rng: {**repo, "path": f"src/module_{rng.randrange(DISTINCT)}.py"}),
+        "get_commit_diff": (10, lambda rng: {**repo, "sha": f"{rng.randrange(DISTINCT):040x}"}),
+        "search_codebase": (5, lambda rng: {**repo, "keyword": f"symbol_{rng.randrange(DISTINCT)}"}),
+        "get_workflow_runs": (3, lambda rng: {**repo, "last_req": 10}),
+        "run_log_analytics_query": (5, lambda rng: {"workspace": "stub", "query": f"AppTraces | take {rng.randrange(1, 500)}"}),
+        "read_db": (5, lambda rng: {"query": f"SELECT * FROM users LIMIT {rng.randrange(1, 200)}"}),
+        "get_azure_openai_response": (5, lambda rng: {"message": f"Summarize item {rng.randrange(10 ** 6)}"}),
+        "get_image_analysis": (3, lambda rng: {"image_url": f"{stub_url}/images/{rng.randrange(DISTINCT)}.png"}),
+        "get_website_content": (5, lambda rng: {"url": f"{stub_url}/pages/{rng.randrange(DISTINCT)}.html"}),
+        "execute_python_code": (2, lambda rng: {"code": "result = sorted(range(20000), key=lambda i: -i)[:10]"}),
+    }
+
+
+def process_tree(root: int) -> list:
+    """PIDs of root and all its descendants (the balancer and its workers)."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    pids, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def sample(root: int) -> tuple:
+    """(CPU seconds used so far, resident memory in bytes) of the server processes."""
+    cpu, rss = 0.0, 0
+    for pid in process_tree(root):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{pid}/statm") as f:
+                resident = int(f.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime + stime
+        rss += resident * PAGE_SIZE
+    return cpu, rss
+
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[max(0, min(len(values) - 1, int(round(q / 100 * len(values))) - 1))]
+
+
+def is_error(result) -> bool:
+    if result.isError:
+        return True
+    # Tools report failures in their payload: null, {"error": ...} or {"type": "error"}
+    text = result.content[0].text if result.content and hasattr(result.content[0], "text") else None
+    if text is None:
+        return not result.content
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return False
+    return data is None or (isinstance(data, dict) and ("error" in data or data.get("type") == "error"))
+
+
+async def client(url: str, deadline: float, choose, rng: random.Random, calls: dict):
+    async with sse_client(url) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            while time.perf_counter() < deadline:
+                name, arguments = choose(rng)
+                start = time.perf_counter()
+                try:
+                    failed = is_error(await session.call_tool(name, arguments))
+                except Exception:
+                    failed = True
+                stats = calls.setdefault(name, {"latencies": [], "errors": 0})
+                stats["latencies"].append(time.perf_counter() - start)
+                stats["errors"] += failed
+
+
+async def run_phase(url: str, server_pid: int, choose, concurrency: int, duration: float, seed: int) -> tuple:
+    """Run concurrency sessions for duration seconds; returns (calls per tool, elapsed seconds, CPU %, peak RSS MB)."""
+    calls = {}
+    peak_rss = 0
+    cpu_start, _ = sample(server_pid)
+    start = time.perf_counter()
+    deadline = start + duration
+    tasks = [asyncio.ensure_future(client(url, deadline, choose, random.Random(seed + i), calls)) for i in range(concurrency)]
+    while not all(t.done() for t in tasks):
+        peak_rss = max(peak_rss, sample(server_pid)[1])
+        await asyncio.wait(tasks, timeout=0.2)
+    elapsed = time.perf_counter() - start
+    for task in tasks:
+        task.result()
+    cpu_end, rss = sample(server_pid)
+    return calls, elapsed, 100 * (cpu_end - cpu_start) / elapsed, max(peak_rss, rss) / 2 ** 20
+
+
+def summarize(stats: dict, elapsed: float) -> dict:
+    latencies = sorted(stats["latencies"])
+    return {
+        "calls": len(latencies),
+        "throughput": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "errors": stats["errors"],
+    }
+
+
+async def wait_ready(url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            async with sse_client(url) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.5)
+
+
+def git_sha() -> str:
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"], cwd=ROOT).returncode != 0
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_row(name: str, row: dict):
+    print(f"{name:<26} {row['calls']:>6} {row['throughput']:>8.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+          f"{row['p99_ms']:>8.1f} {row['errors']:>6} {row.get('cpu_percent', ''):>6} {row.get('rss_mb', ''):>7}")
+
+
+async def benchmark(args) -> dict:
+    # One block: listener, workers, HTTP stubs, PostgreSQL stub
+    port = free_port_block(args.workers + 2)
+    stub_port, pg_port = port + args.workers + 1, port + args.workers + 2
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    tools = workload(stub_url)
+    selected = args.tools or list(tools)
+    unknown = [name for name in selected if name not in tools]
+    if unknown:
+        raise SystemExit(f"Unknown tools {unknown}, available: {', '.join(tools)}")
+
+    stubs = subprocess.Popen([sys.executable, os.path.join(ROOT, "benchmarks", "stubs.py"), "--port", str(stub_port),
+                              "--pg-port", str(pg_port), "--latency-ms", str(args.latency_ms)],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    env = dict(os.environ, **environment(stub_port, pg_port), MCP_WORKERS=str(args.workers), MCP_HOST="127.0.0.1",
+               MCP_PORT=str(port), CACHE_DIR=tempfile.mkdtemp(prefix="mcp-bench-"))
+    server = subprocess.Popen([sys.executable, "server.py"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}/sse"
+    results = {}
+    print(f"{'tool':<26} {'calls':>6} {'calls/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6} {'cpu %':>6} {'rss MB':>7}")
+    try:
+        await asyncio.gather(*(wait_ready(url) for _ in range(args.workers * 2)))
+
+        for name in selected:
+            make_arguments = tools[name][1]
+            calls, elapsed, cpu, rss = await run_phase(url, server.pid, lambda rng: (name, make_arguments(rng)),
+                                                       args.concurrency, args.duration, args.seed)
+            row = summarize(calls.get(name, {"latencies": [], "errors": 0}), elapsed)
+            results[name] = {**row, "cpu_percent": round(cpu, 1), "rss_mb": round(rss, 1)}
+            print_row(name, results[name])
+
+        names = list(selected)
+        weights = [tools[name][0] for name in names]
+
+        def choose(rng: random.Random):
+            name = rng.choices(names, weights)[0]
+            return name, tools[name][1](rng)
+
+        calls, elapsed, cpu, rss = await run_phase(url, server.pid, choose, args.concurrency, args.duration, args.seed)
+        total = {"latencies": [l for s in calls.values() for l in s["latencies"]], "errors": sum(s["errors"] for s in calls.values())}
+        mixed = {
+            **summarize(total, elapsed),
+            "cpu_percent": round(cpu, 1),
+            "rss_mb": round(rss, 1),
+            "tools": {name: summarize(stats, elapsed) for name, stats in sorted(calls.items())},
+        }
+        print_row("mixed", mixed)
+    finally:
+        server.terminate()
+        stubs.terminate()
+        server.wait(timeout=30)
+        stubs.wait(timeout=30)
+
+    return {
+        "commit": git_sha(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {"concurrency": args.concurrency, "duration": args.duration, "latency_ms": args.latency_ms,
+                   "workers": args.workers, "cpus": os.cpu_count()},
+        "tools": results,
+        "mixed": mixed,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """Print the change of each metric against baseline; returns True if a tool regressed by more than threshold %."""
+    print(f"\nCompared to {baseline.get('commit')} ({baseline.get('date')}), regressions over {threshold:g}% marked with !")
+    if baseline.get("config") != current["config"]:
+        print(f"Warning: different settings {baseline.get('config')} -> {current['config']}")
+    print(f"{'tool':<26} {'calls/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'cpu':>9} {'rss':>9}")
+    regressed = False
+    rows = {**current["tools"], "mixed": current["mixed"]}
+    old_rows = {**baseline.get("tools", {}), "mixed": baseline.get("mixed", {})}
+    for name, row in rows.items():
+        old = old_rows.get(name)
+        if not old:
+            continue
+        cells = []
+        # Throughput regresses when it drops, the other metrics when they grow
+        for metric, higher_is_better in (("throughput", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False),
+                                         ("cpu_percent", False), ("rss_mb", False)):
+            if not old.get(metric):
+                cells.append(f"{'-':>9}")
+                continue
+            change = 100 * (row[metric] - old[metric]) / old[metric]
+            worse = -change if higher_is_better else change
+            flag = "!" if worse > threshold else " "
+            regressed |= worse > threshold
+            cells.append(f"{change:>+7.1f}%{flag}")
+        print(f"{name:<26} {' '.join(cells)}")
+    return regressed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", nargs="+", help="Tools to benchmark (default: all)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent MCP sessions")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load per phase")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Mean simulated upstream latency")
+    parser.add_argument("--workers", type=int, default=1, help="MCP_WORKERS of the server")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random arguments")
+    parser.add_argument("--json", help="Write the results to this file (default: benchmarks/results/<git sha>.json)")
+    parser.add_argument("--compare", help="Previous result file to compare with")
+    parser.add_argument("--threshold", type=float, default=10, help="Regression threshold in %% for --compare")
+    args = parser.parse_args()
+
+    result = await benchmark(args)
+
+    path = args.json or os.path.join(RESULTS_DIR, f"{result['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""
+Measure throughput scaling of the multi-worker mode on one machine.
+
+For each worker count, starts `python server.py` with MCP_WORKERS=N, opens
+--clients concurrent MCP SSE sessions through the balancer and calls a
+CPU-bound tool (execute_python_code) for --duration seconds.
+
+Usage:
+    python benchmarks/bench_scaleout.py [--workers 1 2 4] [--clients 16] [--duration 10] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CODE = "result = sum(i * i for i in range(200000))"
+
+
+def free_port_block(size: int) -> int:
+    """Find a port p such that p .. p+size are free (listener + workers)."""
+    while True:
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        if port + size > 65535:
+            continue
+        try:
+            sockets = []
+            for p in range(port, port + size + 1):
+                sock = socket.socket()
+                sockets.append(sock)
+                sock.bind(("127.0.0.1", p))
+            return port
+        except OSError:
+            continue
+        finally:
+            for sock in sockets:
+                sock.close()
+
+
+async def call_loop(url: str, deadline: float, latencies: list):
+    async with sse_client(url) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                result = await session.call_tool("execute_python_code", {"code": CODE})
+                if result.isError:
+                    raise RuntimeError(result.content)
+                latencies.append(time.perf_counter() - start)
+
+
+async def wait_ready(url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await call_loop(url, 0, [])
+            return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.5)
+
+
+async def measure(workers: int, clients: int, duration: float) -> dict:
+    port = free_port_block(workers)
+    env = dict(os.environ, MCP_WORKERS=str(workers), MCP_HOST="127.0.0.1", MCP_PORT=str(port),
+               CACHE_DIR=tempfile.mkdtemp(prefix="mcp-bench-"))
+    server = subprocess.Popen([sys.executable, "server.py"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}/sse"
+    try:
+        await wait_ready(url)
+        # Every worker must be up before measuring
+        await asyncio.gather(*(wait_ready(url) for _ in range(workers * 2)))
+
+        latencies = []
+        start = time.perf_counter()
+        await asyncio.gather(*(call_loop(url, start + duration, latencies) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies.sort()
+    return {
+        "workers": workers,
+        "calls": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to measure")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent MCP sessions")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load per worker count")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'workers':>7} {'calls':>7} {'calls/s':>9} {'scaling':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for workers in args.workers:
+        result = await measure(workers, args.clients, args.duration)
+        result["scaling"] = result["throughput"] / results[0]["throughput"] if results else 1.0
+        results.append(result)
+        print(f"{workers:>7} {result['calls']:>7} {result['throughput']:>9.1f} {result['scaling']:>7.2f}x "
+              f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"clients": args.clients, "duration": args.duration, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""
+Track server startup cost with `python -X importtime`.
+
+Runs `import server` in a fresh interpreter (lazy tool loading, what production
+does) and, for comparison, with every tool module imported eagerly. The child
+gets the placeholder credentials of stubs.py so every tool is enabled,
+whatever the local .env holds (nothing connects to them).
+Reports wall time, total import time, peak RSS and the slowest packages.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat N] [--top N] [--json out.json] [--max-ms MS]
+
+--max-ms exits with status 1 when the lazy import time is above the threshold,
+so the script can guard against regressions in CI.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from stubs import environment
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+CHILD = """
+import json, resource, time
+start = time.perf_counter()
+import server
+if {eager}:
+    from tools.registry import TOOLS, load_target, missing_settings
+    for spec in TOOLS:
+        assert not missing_settings(spec), spec.name
+        load_target(spec)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"wall_ms": elapsed * 1000, "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+
+def run(eager: bool) -> dict:
+    # Ports are never contacted, only the presence of the settings matters
+    env = {**os.environ, **environment(port=1, pg_port=1), "ENABLE_ADMIN_TOOLS": "true"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD.format(eager=eager)],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(proc.stderr)
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append({"module": name, "self_us": int(self_us), "cumulative_us": int(cumulative_us), "depth": len(indent) // 2})
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["import_ms"] = sum(i["self_us"] for i in imports) / 1000
+    result["modules"] = len(imports)
+    result["imports"] = imports
+    return result
+
+
+def summarize(runs: list, top: int) -> dict:
+    # Import time per top-level package in the median run
+    median_run = sorted(runs, key=lambda r: r["import_ms"])[len(runs) // 2]
+    packages = {}
+    for i in median_run["imports"]:
+        package = i["module"].split(".")[0]
+        packages[package] = packages.get(package, 0) + i["self_us"]
+    slowest = sorted(packages.items(), key=lambda item: -item[1])
+    return {
+        "wall_ms": statistics.median(r["wall_ms"] for r in runs),
+        "import_ms": statistics.median(r["import_ms"] for r in runs),
+        "max_rss_kb": statistics.median(r["max_rss_kb"] for r in runs),
+        "modules": median_run["modules"],
+        "slowest": [{"package": package, "ms": us / 1000} for package, us in slowest[:top]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per mode (median is kept)")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to show")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--max-ms", type=float, help="Fail if the lazy import time exceeds this")
+    args = parser.parse_args()
+
+    report = {}
+    for mode, eager in (("lazy", False), ("eager", True)):
+        report[mode] = summarize([run(eager) for _ in range(args.repeat)], args.top)
+        r = report[mode]
+        print(f"{mode:>5}: wall {r['wall_ms']:.0f} ms, imports {r['import_ms']:.0f} ms, "
+              f"{r['modules']} modules, peak RSS {r['max_rss_kb'] / 1024:.1f} MB")
+        for item in r["slowest"]:
+            print(f"         {item['ms']:>8.1f} ms  {item['package']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.max_ms is not None and report["lazy"]["import_ms"] > args.max_ms:
+        sys.exit(f"Startup regression: {report['lazy']['import_ms']:.0f} ms > {args.max_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark the HTML-to-Markdown pipeline of get_website_content over saved pages.
+
+Compares the previous pipeline (UTF-8 decode + full DOM conversion) with the
+current one (charset detection + boilerplate stripping). Both convert with
+lxml: html_to_markdown already picks it when installed, so the gain comes from
+converting less markup, not from the parser. See corpus/README.md for the pages.
+
+Usage:
+    python benchmarks/bench_website_content.py [--corpus DIR] [--repeat N]
+    python benchmarks/bench_website_content.py --save https://example.com/page ...
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from html_to_markdown import convert_to_markdown
+
+from tools.utils.tools import convert_html
+from tools.utils.web import decode_body, detect_encoding, fetch
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+def legacy_pipeline(body: bytes) -> str:
+    text = body.decode("utf-8", errors="replace")  # The old code raised on non UTF-8 pages
+    return re.sub(r'\n{2,}', '\n', convert_to_markdown(text))
+
+
+def current_pipeline(body: bytes) -> str:
+    return convert_html(decode_body(body, detect_encoding(body)))
+
+
+def timeit(fn, body: bytes, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = fn(body)
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def save_pages(urls, corpus: str):
+    os.makedirs(corpus, exist_ok=True)
+    for url in urls:
+        result = fetch(url)
+        parsed = urlparse(url)
+        name = re.sub(r"[^A-Za-z0-9]+", "_", parsed.netloc + parsed.path).strip("_") + ".html"
+        with open(os.path.join(corpus, name), "wb") as f:
+            f.write(result.body)
+        print(f"saved {url} -> {name} ({len(result.body)} bytes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Directory of saved .html pages")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per page (best time is kept)")
+    parser.add_argument("--save", nargs="+", metavar="URL", help="Download pages into the corpus and exit")
+    args = parser.parse_args()
+
+    if args.save:
+        save_pages(args.save, args.corpus)
+        return
+
+    pages = sorted(f for f in os.listdir(args.corpus) if f.endswith((".html", ".htm")))
+    if not pages:
+        sys.exit(f"No .html pages found in {args.corpus}")
+
+    print(f"{'page':<32} {'bytes':>9} {'legacy ms':>10} {'current ms':>11} {'speedup':>8} {'legacy out':>11} {'current out':>12}")
+    total_legacy = total_current = 0.0
+    for page in pages:
+        with open(os.path.join(args.corpus, page), "rb") as f:
+            body = f.read()
+        legacy_time, legacy_out = timeit(legacy_pipeline, body, args.repeat)
+        current_time, current_out = timeit(current_pipeline, body, args.repeat)
+        total_legacy += legacy_time
+        total_current += current_time
+        print(f"{page[:32]:<32} {len(body):>9} {legacy_time * 1000:>10.1f} {current_time * 1000:>11.1f} "
+              f"{legacy_time / current_time:>7.1f}x {len(legacy_out):>11} {len(current_out):>12}")
+
+    print(f"{'total':<32} {'':>9} {total_legacy * 1000:>10.1f} {total_current * 1000:>11.1f} {total_legacy / total_current:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
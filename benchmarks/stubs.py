@@ -0,0 +1,322 @@
+"""
+Local stand-ins for the upstream services, used by bench_e2e.py.
+
+One HTTP listener serves the GitHub REST API, Azure AD, Log Analytics,
+Azure OpenAI (streamed chat completions), Azure Vision, web pages and
+images; a second listener speaks enough of the PostgreSQL wire protocol
+(simple and extended query) for psycopg to run SELECTs. Payloads are
+generated once, deterministically, with sizes close to real responses.
+
+Point the server at them with (see `environment()`):
+    GITHUB_API_URL / AZURE_LOGIN_URL / LOG_ANALYTICS_URL / AZURE_OPENAI_ENDPOINT /
+    VISION_ENDPOINT = http://127.0.0.1:<port>, POSTGRES_HOST/PORT = 127.0.0.1:<pg-port>
+
+Usage:
+    python benchmarks/stubs.py [--port 8990] [--pg-port 8991] [--latency-ms 20]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import re
+import struct
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+TREE_SIZE = 3000
+FILES_PER_COMMIT = 12
+LOG_ROWS = 500
+DB_ROWS = 200
+LLM_CHUNKS = 40
+
+
+def environment(port: int, pg_port: int) -> dict:
+    """Settings pointing every tool at the stubs (credentials are placeholders the stubs accept)."""
+    base = f"http://127.0.0.1:{port}"
+    return {
+        "GITHUB_TOKEN": "stub",
+        "GITHUB_API_URL": base,
+        "AZURE_CLIENT_ID": "stub",
+        "AZURE_CLIENT_SECRET": "stub",
+        "AZURE_TENANT_ID": "stub",
+        "AZURE_LOGIN_URL": base,
+        "LOG_ANALYTICS_URL": base,
+        "AZURE_OPENAI_ENDPOINT": base,
+        "AZURE_OPENAI_KEY": "stub",
+        "VISION_ENDPOINT": base,
+        "VISION_KEY": "stub",
+        "POSTGRES_HOST": "127.0.0.1",
+        "POSTGRES_PORT": str(pg_port),
+        "POSTGRES_DB": "stub",
+        "POSTGRES_USER": "stub",
+        "POSTGRES_PASSWORD": "stub",
+    }
+
+
+class Data:
+    """Deterministic payloads shared by every request."""
+
+    def __init__(self, seed: int = 0):
+        rng = random.Random(seed)
+        words = ("request", "cache", "token", "worker", "session", "budget", "query", "stream", "store", "tool")
+
+        def sentence(n: int) -> str:
+            return " ".join(rng.choice(words) for _ in range(n))
+
+        self.source = "\n".join(f"def {rng.choice(words)}_{i}(value):\n    return value  # {sentence(8)}" for i in range(150))
+        self.tree = [
+            {"path": f"src/pkg_{i // 50}/module_{i}.py" if i % 10 else f"src/pkg_{i // 50}", "type": "blob" if i % 10 else "tree",
+             "sha": f"{i:040x}", "mode": "100644"}
+            for i in range(TREE_SIZE)
+        ]
+        self.runs = [
+            {"id": 9000 + i, "name": rng.choice(("CI", "Release", "Lint")), "status": "completed",
+             "conclusion": rng.choice(("success", "failure")), "created_at": "2026-01-01T00:00:00Z",
+             "html_url": f"https://github.com/octo/demo/actions/runs/{9000 + i}"}
+            for i in range(100)
+        ]
+        self.commits = [
+            {"sha": f"{i:040x}", "commit": {"author": {"name": "octo", "date": "2026-01-01T00:00:00Z"}, "message": sentence(12)}}
+            for i in range(100)
+        ]
+        hunk = "@@ -{0},7 +{0},8 @@\n" + "\n".join(f" {sentence(10)}" for _ in range(3)) + f"\n-{sentence(10)}\n+{sentence(10)}\n+{sentence(10)}\n" + \
+            "\n".join(f" {sentence(10)}" for _ in range(3))
+        self.files = [
+            {"filename": f"src/module_{i}.py", "status": "modified", "patch": "\n".join(hunk.format(10 + 40 * h) for h in range(4))}
+            for i in range(FILES_PER_COMMIT)
+        ]
+        self.log_tables = [{
+            "name": "PrimaryResult",
+            "columns": [{"name": "TimeGenerated", "type": "datetime"}, {"name": "Level", "type": "string"},
+                        {"name": "Message", "type": "string"}],
+            "rows": [["2026-01-01T00:00:00Z", rng.choice(("Info", "Warning", "Error")), sentence(15)] for _ in range(LOG_ROWS)],
+        }]
+        self.db_rows = [(i, f"user_{i}", sentence(8), "2026-01-01 00:00:00+00") for i in range(DB_ROWS)]
+        self.completion = [sentence(3) + " " for _ in range(LLM_CHUNKS)]
+        with open(os.path.join(CORPUS, "article.html"), "rb") as f:
+            self.page = f.read()
+
+
+def github_headers() -> dict:
+    return {"X-RateLimit-Remaining": "4999", "X-RateLimit-Reset": str(int(time.time()) + 3600)}
+
+
+def create_app(data: Data, latency: float) -> Starlette:
+    """HTTP stubs, each response is delayed by latency seconds (+/- 50%) like a remote service."""
+
+    async def delay():
+        if latency:
+            await asyncio.sleep(latency * (0.5 + random.random()))
+
+    async def contents(request: Request):
+        await delay()
+        path = request.path_params["path"]
+        if not path.endswith(".py"):
+            entries = [{"name": e["path"].rsplit("/", 1)[-1], "path": e["path"], "type": "file" if e["type"] == "blob" else "dir"}
+                       for e in data.tree[:50]]
+            return JSONResponse(entries, headers=github_headers())
+        content = base64.b64encode(data.source.encode()).decode()
+        return JSONResponse({"path": path, "type": "file", "encoding": "base64", "content": content}, headers=github_headers())
+
+    async def runs(request: Request):
+        await delay()
+        per_page = int(request.query_params.get("per_page", 30))
+        return JSONResponse({"total_count": len(data.runs), "workflow_runs": data.runs[:per_page]}, headers=github_headers())
+
+    async def search_code(request: Request):
+        await delay()
+        per_page = int(request.query_params.get("per_page", 30))
+        items = [{"path": e["path"], "html_url": f"https://github.com/octo/demo/blob/main/{e['path']}"}
+                 for e in data.tree[:per_page]]
+        return JSONResponse({"total_count": 1234, "items": items}, headers=github_headers())
+
+    async def tree(request: Request):
+        await delay()
+        return JSONResponse({"sha": "0" * 40, "tree": data.tree, "truncated": False}, headers=github_headers())
+
+    async def commits(request: Request):
+        await delay()
+        per_page = int(request.query_params.get("per_page", 30))
+        return JSONResponse(data.commits[:per_page], headers=github_headers())
+
+    async def commit(request: Request):
+        await delay()
+        return JSONResponse({"sha": request.path_params["sha"], "files": data.files}, headers=github_headers())
+
+    async def azure_token(request: Request):
+        await delay()
+        return JSONResponse({"token_type": "Bearer", "expires_in": 3599, "access_token": "stub-token"})
+
+    async def log_query(request: Request):
+        await delay()
+        return JSONResponse({"tables": data.log_tables})
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await delay()
+
+        async def events():
+            for i, part in enumerate(data.completion[:body.get("max_tokens") or LLM_CHUNKS]):
+                chunk = {"id": "stub", "object": "chat.completion.chunk", "created": 0, "model": body.get("model"),
+                         "choices": [{"index": 0, "delta": {"content": part}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                # Tokens arrive over time like a real model
+                await asyncio.sleep(latency / 20)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    async def image_analysis(request: Request):
+        image = await request.body()
+        await delay()
+        lines = [{"text": f"line {i} of {len(image)} bytes", "boundingPolygon": [{"x": 0, "y": i}] * 4, "words": []}
+                 for i in range(5)]
+        return JSONResponse({
+            "modelVersion": "2023-10-01",
+            "metadata": {"width": 640, "height": 480},
+            "captionResult": {"text": "a stub image", "confidence": 0.9},
+            "readResult": {"blocks": [{"lines": lines}]},
+        })
+
+    async def image(request: Request):
+        await delay()
+        name = request.path_params["name"].encode()
+        return Response(b"\x89PNG\r\n\x1a\n" + name * 2048, media_type="image/png")
+
+    async def page(request: Request):
+        await delay()
+        return Response(data.page, media_type="text/html; charset=utf-8")
+
+    async def health(request: Request):
+        return Response("ok")
+
+    return Starlette(routes=[
+        Route("/repos/{owner}/{repo}/contents/{path:path}", contents),
+        Route("/repos/{owner}/{repo}/actions/runs", runs),
+        Route("/search/code", search_code),
+        Route("/repos/{owner}/{repo}/git/trees/{branch}", tree),
+        Route("/repos/{owner}/{repo}/commits", commits),
+        Route("/repos/{owner}/{repo}/commits/{sha}", commit),
+        Route("/{tenant}/oauth2/v2.0/token", azure_token, methods=["POST"]),
+        Route("/v1/workspaces/{workspace}/query", log_query, methods=["POST"]),
+        Route("/openai/deployments/{deployment}/chat/completions", chat_completions, methods=["POST"]),
+        Route("/computervision/imageanalysis:analyze", image_analysis, methods=["POST"]),
+        Route("/images/{name}", image),
+        Route("/pages/{name}", page),
+        Route("/health", health),
+    ])
+
+
+class PostgresStub:
+    """
+    Minimal PostgreSQL server: trusts every login and answers any query with
+    data.db_rows (honoring a trailing LIMIT n).
+    """
+
+    COLUMNS = (("id", 23), ("name", 25), ("bio", 25), ("created_at", 25))  # int4 and text OIDs
+
+    def __init__(self, data: Data, latency: float):
+        self.data = data
+        self.latency = latency
+
+    @staticmethod
+    def message(kind: bytes, payload: bytes = b"") -> bytes:
+        return kind + struct.pack("!i", len(payload) + 4) + payload
+
+    def row_description(self) -> bytes:
+        fields = b"".join(name.encode() + b"\0" + struct.pack("!ihihih", 0, 0, oid, -1, -1, 0) for name, oid in self.COLUMNS)
+        return self.message(b"T", struct.pack("!h", len(self.COLUMNS)) + fields)
+
+    def rows(self, query: str) -> bytes:
+        match = re.search(r"limit\s+(\d+)\s*;?\s*$", query, re.IGNORECASE)
+        rows = self.data.db_rows[:int(match.group(1))] if match else self.data.db_rows
+        out = []
+        for row in rows:
+            cells = [str(v).encode() for v in row]
+            out.append(self.message(b"D", struct.pack("!h", len(cells)) + b"".join(struct.pack("!i", len(c)) + c for c in cells)))
+        out.append(self.message(b"C", f"SELECT {len(rows)}\0".encode()))
+        return b"".join(out)
+
+    async def startup(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        while True:
+            length, code = struct.unpack("!ii", await reader.readexactly(8))
+            await reader.readexactly(length - 8)
+            if code in (80877103, 80877104):  # SSLRequest, GSSENCRequest: not supported
+                writer.write(b"N")
+                continue
+            if code == 80877102:  # CancelRequest
+                return False
+            break
+        writer.write(self.message(b"R", struct.pack("!i", 0)))
+        for key, value in (("server_version", "16.0"), ("server_encoding", "UTF8"), ("client_encoding", "UTF8"),
+                           ("DateStyle", "ISO, MDY"), ("integer_datetimes", "on"), ("standard_conforming_strings", "on")):
+            writer.write(self.message(b"S", key.encode() + b"\0" + value.encode() + b"\0"))
+        writer.write(self.message(b"K", struct.pack("!ii", os.getpid(), 0)))
+        writer.write(self.message(b"Z", b"I"))
+        return True
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            if not await self.startup(reader, writer):
+                return
+            query = ""
+            while True:
+                await writer.drain()
+                kind = await reader.readexactly(1)
+                length, = struct.unpack("!i", await reader.readexactly(4))
+                body = await reader.readexactly(length - 4)
+                if kind == b"X":
+                    return
+                if kind == b"Q":
+                    await asyncio.sleep(self.latency)
+                    writer.write(self.row_description() + self.rows(body[:-1].decode()) + self.message(b"Z", b"I"))
+                elif kind == b"P":
+                    query = body.split(b"\0")[1].decode()
+                    writer.write(self.message(b"1"))
+                elif kind == b"B":
+                    writer.write(self.message(b"2"))
+                elif kind == b"D":
+                    if body[:1] == b"S":
+                        writer.write(self.message(b"t", struct.pack("!h", 0)))
+                    writer.write(self.row_description())
+                elif kind == b"E":
+                    await asyncio.sleep(self.latency)
+                    writer.write(self.rows(query))
+                elif kind == b"C":
+                    writer.write(self.message(b"3"))
+                elif kind == b"S":
+                    writer.write(self.message(b"Z", b"I"))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(port: int, pg_port: int, latency: float):
+    data = Data()
+    pg = await asyncio.start_server(PostgresStub(data, latency).handle, "127.0.0.1", pg_port)
+    config = uvicorn.Config(create_app(data, latency), host="127.0.0.1", port=port, log_level="warning", access_log=False)
+    async with pg:
+        await uvicorn.Server(config).serve()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8990, help="HTTP stubs port")
+    parser.add_argument("--pg-port", type=int, default=8991, help="PostgreSQL stub port")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Mean simulated upstream latency")
+    args = parser.parse_args()
+    asyncio.run(serve(args.port, args.pg_port, args.latency_ms / 1000))
+
+
+if __name__ == "__main__":
+    main()
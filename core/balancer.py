@@ -0,0 +1,176 @@
+"""
+Multi-worker mode: one listener in front of several server processes.
+
+The balancer starts MCP_WORKERS copies of the server on the ports following
+MCP_PORT (bound to localhost) and proxies requests to them. SSE sessions are
+pinned to the worker that opened them: the session id announced in the
+`endpoint` event is recorded, and every `POST /messages/?session_id=...` is
+sent back to that worker. New SSE streams go to the worker with the fewest
+open streams. Workers are restarted if they exit.
+"""
+import asyncio
+import itertools
+import os
+import re
+import subprocess
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+from core.config import settings
+from core.logger import logger
+from core.store import get_store
+
+# Headers that only make sense for a single connection
+HOP_HEADERS = {"connection", "keep-alive", "proxy-connection", "transfer-encoding", "te", "trailer", "upgrade", "host", "content-length"}
+SESSION_ID = re.compile(rb"session_id=([0-9a-fA-F-]+)")
+# Session affinity entries live at most this long in the shared store
+SESSION_TTL = 24 * 3600
+
+
+class Balancer:
+    def __init__(self, workers: int, command: list, port: int):
+        self.command = command
+        self.ports = [port + 1 + i for i in range(workers)]
+        self.processes: dict = {}
+        self.streams = [0] * workers  # Open SSE streams per worker
+        self.sessions: dict = {}  # session id -> worker index
+        self._round_robin = itertools.cycle(range(workers))
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30, read=None),
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=64),
+        )
+
+    def spawn(self, index: int):
+        env = dict(os.environ, MCP_WORKERS="1", MCP_HOST="127.0.0.1", MCP_PORT=str(self.ports[index]))
+        self.processes[index] = subprocess.Popen(self.command, env=env)
+        logger.info(f"Started worker {index} on port {self.ports[index]} (pid {self.processes[index].pid})")
+
+    async def supervise(self):
+        while True:
+            for index, process in list(self.processes.items()):
+                if process.poll() is not None:
+                    logger.error(f"Worker {index} exited with {process.returncode}, restarting")
+                    for session_id in [s for s, i in self.sessions.items() if i == index]:
+                        self.unbind(session_id)
+                    self.spawn(index)
+            await asyncio.sleep(1)
+
+    def stop(self):
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def bind(self, session_id: str, index: int):
+        self.sessions[session_id] = index
+        get_store().set(f"mcp_session:{session_id}", index, SESSION_TTL)
+
+    def unbind(self, session_id: str):
+        self.sessions.pop(session_id, None)
+        get_store().delete(f"mcp_session:{session_id}")
+
+    def lookup(self, session_id: str) -> Optional[int]:
+        index = self.sessions.get(session_id)
+        if index is None:
+            index = get_store().get(f"mcp_session:{session_id}")
+        return index
+
+    def pick(self, request: Request) -> Optional[int]:
+        session_id = request.query_params.get("session_id")
+        if session_id:
+            return self.lookup(session_id)
+        if request.method == "GET" and request.url.path.rstrip("/").endswith("/sse"):
+            return min(range(len(self.ports)), key=lambda i: self.streams[i])
+        return next(self._round_robin)
+
+    async def relay_events(self, upstream: httpx.Response, index: int):
+        """Stream an SSE response back, learning the session id from the endpoint event."""
+        self.streams[index] += 1
+        session_id, head = None, b""
+        try:
+            async for chunk in upstream.aiter_raw():
+                if session_id is None and len(head) < 8192:
+                    head += chunk
+                    match = SESSION_ID.search(head)
+                    if match:
+                        session_id = match.group(1).decode()
+                        self.bind(session_id, index)
+                yield chunk
+        finally:
+            self.streams[index] -= 1
+            await upstream.aclose()
+            if session_id is not None:
+                self.unbind(session_id)
+
+    async def proxy(self, request: Request) -> Response:
+        index = self.pick(request)
+        if index is None:
+            return Response("Unknown session", status_code=404)
+
+        url = f"http://127.0.0.1:{self.ports[index]}{request.url.path}"
+        if request.url.query:
+            url += f"?{request.url.query}"
+        headers = [(k, v) for k, v in request.headers.items() if k.lower() not in HOP_HEADERS]
+        upstream_request = self.client.build_request(request.method, url, headers=headers, content=await request.body())
+        try:
+            upstream = await self.client.send(upstream_request, stream=True)
+        except httpx.TransportError as e:
+            logger.error(f"Worker {index} unavailable: {e}")
+            return Response("Worker unavailable", status_code=503)
+
+        response_headers = {k: v for k, v in upstream.headers.items() if k.lower() not in HOP_HEADERS}
+        if upstream.headers.get("content-type", "").startswith("text/event-stream"):
+            return StreamingResponse(self.relay_events(upstream, index), status_code=upstream.status_code, headers=response_headers)
+
+        try:
+            body = b"".join([chunk async for chunk in upstream.aiter_raw()])
+        finally:
+            await upstream.aclose()
+        return Response(body, status_code=upstream.status_code, headers=response_headers)
+
+
+def create_app(balancer: Balancer) -> Starlette:
+    @asynccontextmanager
+    async def lifespan(app):
+        for index in range(len(balancer.ports)):
+            balancer.spawn(index)
+        supervisor = asyncio.create_task(balancer.supervise())
+        try:
+            yield
+        finally:
+            supervisor.cancel()
+            balancer.stop()
+            await balancer.client.aclose()
+
+    methods = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "HEAD"]
+    return Starlette(
+        routes=[Route("/{path:path}", balancer.proxy, methods=methods)],
+        lifespan=lifespan,
+    )
+
+
+def run_balancer(command: list, workers: int = None, host: str = None, port: int = None):
+    """
+    Serve on host:port and proxy to `workers` processes started with `command`.
+
+    Args:
+        command: Command starting one server process (it reads MCP_HOST / MCP_PORT)
+        workers: Number of worker processes (default: MCP_WORKERS)
+        host:    Listener host (default: MCP_HOST)
+        port:    Listener port (default: MCP_PORT), workers use the following ports
+    """
+    workers = workers or settings.MCP_WORKERS
+    host = host or settings.MCP_HOST
+    port = port or settings.MCP_PORT
+    logger.info(f"Starting {workers} workers behind {host}:{port}")
+    uvicorn.run(create_app(Balancer(workers, command, port)), host=host, port=port, log_level="warning")
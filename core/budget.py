@@ -0,0 +1,227 @@
+import json
+import re
+from functools import lru_cache
+from typing import Any, List, Optional
+
+from core.config import settings
+from core.logger import logger
+
+try:
+    import tiktoken
+except ImportError:  # Fallback to a character based estimate
+    tiktoken = None
+
+# Rough average for English text / code when no tokenizer is available
+CHARS_PER_TOKEN = 4
+# Share of the budget given to the head of a truncated text or table (the rest goes to the tail)
+HEAD_RATIO = 0.7
+
+HUNK_HEADER = re.compile(r"^@@ .* @@")
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str = "o200k_base"):
+    """Load the tokenizer once, it is expensive to build."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:  # The encoding file is downloaded on first use
+        logger.warning(f"Unable to load tiktoken encoding {name}, estimating tokens from length: {e}")
+        return None
+
+
+def resolve_budget(max_tokens: Optional[int]) -> int:
+    """Tool budget, falling back to OUTPUT_MAX_TOKENS. 0 means unlimited."""
+    if max_tokens is None:
+        max_tokens = settings.OUTPUT_MAX_TOKENS
+    return max(0, int(max_tokens))
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens in a string."""
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_value_tokens(value: Any) -> int:
+    """Count the tokens of a value as it will be serialized in the tool response."""
+    if isinstance(value, str):
+        return count_tokens(value)
+    return count_tokens(json.dumps(value, ensure_ascii=False, default=str))
+
+
+def fits(text: str, max_tokens: int) -> bool:
+    # A token is never shorter than one byte (byte-level BPE), so short strings skip tokenization
+    return max_tokens == 0 or len(text.encode("utf-8")) <= max_tokens or count_tokens(text) <= max_tokens
+
+
+def _cut_line(line: str, max_tokens: int, reverse: bool = False) -> str:
+    """Longest start (or end) of a line that fits in max_tokens."""
+    chars = len(line) * max_tokens // max(1, count_tokens(line))
+    while chars > 0:
+        piece = line[len(line) - chars:] if reverse else line[:chars]
+        if count_tokens(piece) <= max_tokens:
+            return piece
+        chars = chars * 9 // 10
+    return ""
+
+
+def _take_lines(lines: List[str], max_tokens: int, reverse: bool = False, cut: bool = False) -> List[str]:
+    """
+    Whole lines from the start (or end) that fit in max_tokens. With cut, the
+    first line that does not fit is cut on characters to fill the rest of the budget.
+    """
+    kept, used = [], 0
+    for line in (reversed(lines) if reverse else lines):
+        cost = count_tokens(line) + 1
+        if used + cost > max_tokens:
+            piece = _cut_line(line, max_tokens - used - 1, reverse) if cut and max_tokens - used > 1 else ""
+            if piece:
+                kept.append(piece)
+            break
+        kept.append(line)
+        used += cost
+    return kept[::-1] if reverse else kept
+
+
+def truncate_text(text: Optional[str], max_tokens: int) -> Optional[str]:
+    """
+    Keep the beginning and the end of a text, dropping whole lines in the middle.
+
+    Args:
+        text:       Text to truncate
+        max_tokens: Token budget (0 for unlimited)
+
+    Returns:
+        The text unchanged if it fits, otherwise head + marker + tail.
+    """
+    if text is None or fits(text, max_tokens):
+        return text
+
+    lines = text.split("\n")
+    if len(lines) == 1:
+        # Single long line (e.g. transcripts): cut on characters
+        chars = len(text) * max_tokens // count_tokens(text)
+        head = int(chars * HEAD_RATIO)
+        return text[:head] + f" ... ({len(text) - chars} characters truncated) ... " + text[len(text) - (chars - head):]
+
+    # A line too long for the budget (minified code, long paragraph) is cut instead of dropped
+    head = _take_lines(lines, int(max_tokens * HEAD_RATIO), cut=True)
+    head_cut = bool(head) and head[-1] != lines[len(head) - 1]
+    rest = lines[len(head) - head_cut:]
+    tail = _take_lines(rest, max_tokens - int(max_tokens * HEAD_RATIO), reverse=True, cut=True)
+    tail_cut = bool(tail) and tail[0] != rest[len(rest) - len(tail)]
+    if head_cut and tail_cut and len(tail) == len(rest):
+        # Both ends come from the same line, do not repeat its middle
+        tail[0] = tail[0][max(0, len(head[-1]) + len(tail[0]) - len(rest[0])):]
+
+    if head_cut or tail_cut:
+        kept = len("\n".join(head)) + len("\n".join(tail)) + 1
+        marker = f"... ({max(0, len(text) - kept)} characters truncated) ..."
+    else:
+        marker = f"... ({len(lines) - len(head) - len(tail)} lines truncated) ..."
+    return "\n".join(head + [marker] + tail)
+
+
+def truncate_diff(patch: Optional[str], max_tokens: int) -> Optional[str]:
+    """
+    Truncate a unified diff, always keeping every hunk header.
+
+    Args:
+        patch:      Unified diff text
+        max_tokens: Token budget (0 for unlimited)
+
+    Returns:
+        The diff with hunk bodies cut once the budget is spent.
+    """
+    if patch is None or fits(patch, max_tokens):
+        return patch
+
+    # Split into hunks (the preamble before the first header is its own chunk)
+    hunks: List[List[str]] = [[]]
+    for line in patch.split("\n"):
+        if HUNK_HEADER.match(line):
+            hunks.append([])
+        hunks[-1].append(line)
+    hunks = [hunk for hunk in hunks if hunk]
+
+    headers = [hunk[0] for hunk in hunks if HUNK_HEADER.match(hunk[0])]
+    remaining = max(0, max_tokens - sum(count_tokens(h) + 1 for h in headers))
+
+    # Share the budget between hunks, unused budget rolls over to the next ones
+    result = []
+    for index, hunk in enumerate(hunks):
+        has_header = bool(HUNK_HEADER.match(hunk[0]))
+        body = hunk[1:] if has_header else hunk
+        kept = _take_lines(body, remaining // (len(hunks) - index))
+        remaining -= sum(count_tokens(line) + 1 for line in kept)
+        if has_header:
+            result.append(hunk[0])
+        result.extend(kept)
+        if len(kept) < len(body):
+            result.append(f"... ({len(body) - len(kept)} lines truncated)")
+    return "\n".join(result)
+
+
+def truncate_patches(patches: List[Optional[str]], max_tokens: int) -> List[Optional[str]]:
+    """
+    Truncate the diffs of several files sharing one budget.
+
+    Smaller patches are handled first and their unused budget rolls over to the
+    larger ones, as truncate_diff does between hunks.
+
+    Args:
+        patches:    Unified diffs (None for binary files)
+        max_tokens: Token budget shared by every patch (0 for unlimited)
+
+    Returns:
+        The patches, in the same order.
+    """
+    if max_tokens == 0:
+        return list(patches)
+
+    costs = [count_tokens(patch) if patch else 0 for patch in patches]
+    result = list(patches)
+    remaining = max_tokens
+    order = sorted(range(len(patches)), key=lambda i: costs[i])
+    for index, i in enumerate(order):
+        if patches[i] is None:
+            continue
+        # 0 would mean unlimited to truncate_diff
+        result[i] = truncate_diff(patches[i], max(1, remaining // (len(order) - index)))
+        remaining -= costs[i] if result[i] is patches[i] else count_tokens(result[i])
+    return result
+
+
+def truncate_rows(rows: Optional[list], max_tokens: int) -> Optional[list]:
+    """
+    Keep the first and last rows of a table that fit in the budget.
+
+    Args:
+        rows:       List of rows (any JSON serializable value)
+        max_tokens: Token budget (0 for unlimited)
+
+    Returns:
+        head rows + a marker row + tail rows if the table is too large.
+    """
+    if not rows or max_tokens == 0 or count_value_tokens(rows) <= max_tokens:
+        return rows
+
+    costs = [count_value_tokens(row) + 1 for row in rows]
+    head_budget = int(max_tokens * HEAD_RATIO)
+    head, used = 0, 0
+    while head < len(rows) and used + costs[head] <= head_budget:
+        used += costs[head]
+        head += 1
+    tail, used = 0, 0
+    while tail < len(rows) - head and used + costs[-1 - tail] <= max_tokens - head_budget:
+        used += costs[-1 - tail]
+        tail += 1
+
+    dropped = len(rows) - head - tail
+    return rows[:head] + [f"... ({dropped} rows truncated) ..."] + (rows[-tail:] if tail else [])
@@ -0,0 +1,267 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from core.logger import logger
+from core.store import get_store
+
+# Expired entries are kept this long so they can be served when the upstream fails
+STALE_TTL = 7 * 24 * 3600
+# Seconds between checks of the purge generation, i.e. how long other workers
+# may keep serving an entry from memory after it was purged
+GENERATION_CHECK_INTERVAL = 1.0
+
+
+class TTLCache:
+    """
+    Two level (memory LRU + shared store) cache with a time to live, and
+    single-flight deduplication of concurrent fetches for the same key.
+
+    Values must be JSON serializable to reach the shared store (see core/store.py).
+    Every cache is listed in TTLCache.instances by namespace. A purge bumps a
+    generation counter in the store, and every worker drops its memory when it
+    sees the counter change.
+    """
+
+    instances: "dict[str, TTLCache]" = {}
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        maxsize: int = 1024,
+        shared: bool = True,
+        stale_while_revalidate: float = 0,
+        should_cache: Optional[Callable[[Any], bool]] = None,
+    ):
+        """
+        Args:
+            namespace:              Name of the cache, prefix of its keys in the store
+            ttl:                    Seconds a value is fresh
+            maxsize:                Number of values kept in memory
+            shared:                 Also keep values in the shared store
+            stale_while_revalidate: Seconds after expiry during which the old value is
+                                    returned at once while a refresh runs in the background
+            should_cache:           Predicate deciding if a fetched value is stored (default: all)
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.shared = shared
+        self.stale_while_revalidate = stale_while_revalidate
+        self.should_cache = should_cache
+        self.stats = {"hits": 0, "stale": 0, "coalesced": 0, "misses": 0, "errors": 0}
+        self._memory: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._inflight: dict = {}
+        self._generation = None
+        self._generation_checked = 0.0
+        TTLCache.instances[namespace] = self
+
+    def _store_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _generation_key(self) -> str:
+        return f"cache_generation:{self.namespace}"
+
+    def _generation_due(self) -> bool:
+        return self.shared and time.monotonic() - self._generation_checked >= GENERATION_CHECK_INTERVAL
+
+    def _read_generation(self) -> Optional[int]:
+        try:
+            return get_store().get(self._generation_key()) or 0
+        except Exception as e:
+            logger.warning(f"Unable to read {self.namespace} generation from the store: {e}")
+            return self._generation
+
+    def _sync_generation(self, generation: Optional[int]):
+        """Drop the memory level if another worker purged the cache since the last check."""
+        self._generation_checked = time.monotonic()
+        if generation != self._generation:
+            self._memory.clear()
+            self._generation = generation
+
+    def _read_store(self, key: str) -> Optional[Tuple[Any, float]]:
+        try:
+            stored = get_store().get(self._store_key(key))
+        except Exception as e:
+            logger.warning(f"Unable to read {self.namespace} entry from the store: {e}")
+            return None
+        return tuple(stored) if stored is not None else None
+
+    def _write_store(self, key: str, entry: Tuple[Any, float]):
+        try:
+            # Kept STALE_TTL past expiry so it can be served when the upstream fails
+            get_store().set(self._store_key(key), list(entry), self.ttl + max(STALE_TTL, self.stale_while_revalidate))
+        except Exception as e:
+            logger.warning(f"Unable to write {self.namespace} entry to the store: {e}")
+
+    def _memory_entry(self, key: str) -> Tuple[Optional[Tuple[Any, float]], bool]:
+        """(entry in memory, whether it can be used without asking the store)"""
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            if entry[1] >= time.time() or not self.shared:
+                return entry, True
+        return entry, not self.shared
+
+    def _lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        if self._generation_due():
+            self._sync_generation(self._read_generation())
+        entry, final = self._memory_entry(key)
+        if not final:
+            # Another worker may have refreshed the value
+            stored = self._read_store(key)
+            if stored is not None:
+                entry = stored
+                self._remember(key, entry)
+        return entry
+
+    async def _lookup_async(self, key: str) -> Optional[Tuple[Any, float]]:
+        """_lookup with the store reads in a thread, SQLite and Redis calls block."""
+        if self._generation_due():
+            self._sync_generation(await asyncio.to_thread(self._read_generation))
+        entry, final = self._memory_entry(key)
+        if not final:
+            stored = await asyncio.to_thread(self._read_store, key)
+            if stored is not None:
+                entry = stored
+                self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: Tuple[Any, float]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str, default: Any = None, allow_stale: bool = False) -> Any:
+        """Return the cached value, or default if missing or expired."""
+        entry = self._lookup(key)
+        if entry is None or (not allow_stale and entry[1] < time.time()):
+            return default
+        return entry[0]
+
+    def set(self, key: str, value: Any):
+        entry = (value, time.time() + self.ttl)
+        self._remember(key, entry)
+        if self.shared:
+            self._write_store(key, entry)
+
+    def _purge_memory(self, key: Optional[str]) -> int:
+        if key is not None:
+            return int(self._memory.pop(key, None) is not None)
+        removed = len(self._memory)
+        self._memory.clear()
+        return removed
+
+    def _purge_store(self, key: Optional[str]) -> int:
+        """Remove the entries from the store and bump the generation; returns the new generation."""
+        store = get_store()
+        if key is not None:
+            store.delete(self._store_key(key))
+        else:
+            store.delete_prefix(self._store_key(""))
+        generation = (store.get(self._generation_key()) or 0) + 1
+        store.set(self._generation_key(), generation)
+        return generation
+
+    def _purged(self, generation: int):
+        # This worker is already up to date
+        self._generation = generation
+        self._generation_checked = time.monotonic()
+
+    def purge(self, key: Optional[str] = None) -> int:
+        """
+        Remove one key, or every entry when key is None, from memory and the shared store.
+
+        Other workers drop their memory level within GENERATION_CHECK_INTERVAL.
+
+        Returns:
+            The number of entries removed from this process' memory.
+        """
+        removed = self._purge_memory(key)
+        if self.shared:
+            self._purged(self._purge_store(key))
+        return removed
+
+    async def purge_async(self, key: Optional[str] = None) -> int:
+        """purge with the store calls in a thread, the memory level is only touched from the event loop."""
+        removed = self._purge_memory(key)
+        if self.shared:
+            self._purged(await asyncio.to_thread(self._purge_store, key))
+        return removed
+
+    def entries(self) -> list:
+        """Entries held in this process' memory, least recently used first."""
+        now = time.time()
+        return [{"key": key, "expires_in": round(expires - now, 1)} for key, (_, expires) in self._memory.items()]
+
+    def summary(self) -> dict:
+        requests = sum(self.stats.values()) - self.stats["errors"]
+        served = self.stats["hits"] + self.stats["stale"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "hit_rate": round(served / requests, 3) if requests else None,
+            "size": len(self._memory),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+        }
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, calling fetch() on a miss.
+
+        Concurrent misses for the same key share a single fetch. Values expired
+        for less than stale_while_revalidate are returned at once and refreshed
+        in the background. If the fetch fails and an expired value is still
+        known, that value is returned.
+        """
+        entry = await self._lookup_async(key)
+        now = time.time()
+        if entry is not None and entry[1] >= now:
+            self.stats["hits"] += 1
+            return entry[0]
+
+        future = self._inflight.get(key)
+        if entry is not None and entry[1] + self.stale_while_revalidate >= now:
+            self.stats["stale"] += 1
+            if future is None:
+                self._start_fetch(key, fetch)
+            return entry[0]
+
+        if future is None:
+            self.stats["misses"] += 1
+            future = self._start_fetch(key, fetch)
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(future)
+
+    def _start_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        future = asyncio.ensure_future(self._fetch(key, fetch))
+        self._inflight[key] = future
+
+        def done(f: asyncio.Future):
+            self._inflight.pop(key, None)
+            # Also marks the exception as retrieved for background refreshes nobody awaits
+            if not f.cancelled() and f.exception() is not None:
+                self.stats["errors"] += 1
+
+        future.add_done_callback(done)
+        return future
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await fetch()
+        except Exception as e:
+            stale = await self._lookup_async(key)
+            if stale is None:
+                raise
+            logger.warning(f"{self.namespace} fetch failed, serving stale value: {e}")
+            return stale[0]
+        if self.should_cache is None or self.should_cache(value):
+            entry = (value, time.time() + self.ttl)
+            self._remember(key, entry)
+            if self.shared:
+                await asyncio.to_thread(self._write_store, key, entry)
+        return value
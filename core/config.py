@@ -21,10 +21,35 @@ class Settings(BaseSettings):
     POSTGRES_USER: str = os.getenv("POSTGRES_USER", "")
     POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "")
 
+    # Upstream base URLs, overridden to point the tools at local stubs (benchmarks/stubs.py)
+    GITHUB_API_URL: str = os.getenv("GITHUB_API_URL", "https://api.github.com")
+    AZURE_LOGIN_URL: str = os.getenv("AZURE_LOGIN_URL", "https://login.microsoftonline.com")
+    LOG_ANALYTICS_URL: str = os.getenv("LOG_ANALYTICS_URL", "https://api.loganalytics.io")
+
     AZURE_OPENAI_ENDPOINT: str = os.getenv("AZURE_OPENAI_ENDPOINT", "")
     AZURE_OPENAI_KEY: str = os.getenv("AZURE_OPENAI_KEY", "")
     AZURE_OPENAI_API_VERSION: str = os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
 
+    # Default token budget for tool outputs (0 for unlimited)
+    OUTPUT_MAX_TOKENS: int = os.getenv("OUTPUT_MAX_TOKENS", 20000)
+
+    # Directory of the on-disk cache for search results and transcripts ("" to keep caches in memory only)
+    CACHE_DIR: str = os.getenv("CACHE_DIR", ".cache")
+
+    # Shared store for caches, rate limits, tokens and sessions: memory, sqlite (file in CACHE_DIR) or redis
+    STORE_BACKEND: str = os.getenv("STORE_BACKEND", "sqlite")
+    STORE_URL: str = os.getenv("STORE_URL", "")  # SQLite path or redis:// URL
+    # Entries kept in the memory or SQLite store, the oldest are evicted first (0 for unlimited, Redis: use maxmemory)
+    STORE_MAX_ENTRIES: int = os.getenv("STORE_MAX_ENTRIES", 100000)
+
+    MCP_HOST: str = os.getenv("MCP_HOST", "0.0.0.0")
+    MCP_PORT: int = os.getenv("MCP_PORT", 6277)
+    # Number of server processes behind the listener (1 runs a single process)
+    MCP_WORKERS: int = os.getenv("MCP_WORKERS", 1)
+
+    # Expose the inspect_cache / purge_cache tools
+    ENABLE_ADMIN_TOOLS: bool = os.getenv("ENABLE_ADMIN_TOOLS", False)
+
     # Pydantic v2 config
     model_config = SettingsConfigDict(
         extra="ignore",  # Ignore extra fields
@@ -0,0 +1,70 @@
+import inspect
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from core.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+    Marks a tool as idempotent and describes how its results are cached.
+
+    Args:
+        ttl:                    Seconds a result is fresh
+        maxsize:                Number of results kept in memory per worker
+        stale_while_revalidate: Seconds after expiry during which the old result is
+                                returned at once while it is refreshed in the background
+        key:                    Builds the cache key from the call arguments (default: all of them)
+    """
+    ttl: float
+    maxsize: int = 1024
+    stale_while_revalidate: float = 0
+    key: Optional[Callable[[dict], str]] = None
+
+
+def default_key(arguments: dict) -> str:
+    return json.dumps(arguments, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def is_cacheable(result: Any) -> bool:
+    """Tools report failures as None or {"error": ...} / {"type": "error"}, those are not cached."""
+    if result is None:
+        return False
+    if isinstance(result, dict) and ("error" in result or result.get("type") == "error"):
+        return False
+    return True
+
+
+def memoize(fn: Callable, policy: CachePolicy, name: str) -> Callable:
+    """
+    Wrap a tool function with a TTLCache named "tool:<name>".
+
+    Identical calls in flight are coalesced into one upstream call. The MCP
+    Context (ctx) is not part of the key.
+
+    Returns:
+        An async function taking the tool arguments as keywords.
+    """
+    cache = TTLCache(
+        f"tool:{name}",
+        ttl=policy.ttl,
+        maxsize=policy.maxsize,
+        stale_while_revalidate=policy.stale_while_revalidate,
+        should_cache=is_cacheable,
+    )
+    make_key = policy.key or default_key
+
+    async def call(arguments: dict):
+        result = fn(**arguments)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def memoized(**arguments):
+        key = make_key({k: v for k, v in arguments.items() if k != "ctx"})
+        return await cache.get_or_fetch(key, lambda: call(arguments))
+
+    memoized.cache = cache
+    return memoized
@@ -0,0 +1,193 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from core.config import settings
+from core.logger import logger
+
+# Expired entries are deleted, and the entry cap enforced, every SWEEP_INTERVAL
+# seconds or SWEEP_WRITES writes, whichever comes first
+SWEEP_INTERVAL = 60.0
+SWEEP_WRITES = 1000
+
+
+class MemoryStore:
+    """Process local store, used when nothing has to be shared."""
+
+    def __init__(self, max_entries: int = 0):
+        """
+        Args:
+            max_entries: Number of entries kept, the least recently written are evicted first (0 for unlimited)
+        """
+        self._data = {}
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._swept = time.monotonic()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] < time.time():
+                del self._data[key]
+                return None
+            return json.loads(entry[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires = time.time() + ttl if ttl else None
+        with self._lock:
+            # Re-inserted so the dict stays ordered by write time
+            self._data.pop(key, None)
+            self._data[key] = (json.dumps(value, ensure_ascii=False), expires)
+            if self._max_entries:
+                while len(self._data) > self._max_entries:
+                    del self._data[next(iter(self._data))]
+            if time.monotonic() - self._swept >= SWEEP_INTERVAL:
+                self._sweep()
+
+    def _sweep(self):
+        """Delete expired entries (called with the lock held)."""
+        now = time.time()
+        for key in [k for k, (_, expires) in self._data.items() if expires is not None and expires < now]:
+            del self._data[key]
+        self._swept = time.monotonic()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+
+class SQLiteStore:
+    """Store shared by the processes of one machine, backed by a SQLite file in WAL mode."""
+
+    def __init__(self, path: str, max_entries: int = 0):
+        """
+        Args:
+            path:        SQLite file, shared by every process using it
+            max_entries: Number of rows kept, the least recently written are evicted first (0 for unlimited)
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        # Cached tool results may come from private repositories (the WAL files inherit this mode)
+        os.chmod(path, 0o600)
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS store (key TEXT PRIMARY KEY, value TEXT, expires REAL)")
+            self._sweep()
+
+    def _sweep(self):
+        """Delete expired rows, then the oldest rows over max_entries (called with the lock held)."""
+        self._conn.execute("DELETE FROM store WHERE expires < ?", (time.time(),))
+        if self._max_entries:
+            # INSERT OR REPLACE gives a rewritten key a new, larger rowid: the smallest are the oldest writes
+            excess = self._conn.execute("SELECT COUNT(*) FROM store").fetchone()[0] - self._max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM store WHERE rowid IN (SELECT rowid FROM store ORDER BY rowid LIMIT ?)", (excess,)
+                )
+        self._swept = time.monotonic()
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM store WHERE key = ? AND (expires IS NULL OR expires >= ?)", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires = time.time() + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO store (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires),
+            )
+            self._writes += 1
+            if self._writes >= SWEEP_WRITES or time.monotonic() - self._swept >= SWEEP_INTERVAL:
+                self._sweep()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM store WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix: str):
+        # substr instead of LIKE, prefixes may contain % or _
+        with self._lock:
+            self._conn.execute("DELETE FROM store WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+
+class RedisStore:
+    """Store shared by every replica, backed by Redis (or any Redis compatible server)."""
+
+    def __init__(self, url: str):
+        import redis
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._client.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._client.set(key, json.dumps(value, ensure_ascii=False), px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key: str):
+        self._client.delete(key)
+
+    def delete_prefix(self, prefix: str):
+        pattern = "".join("\\" + c if c in "\\*?[]" else c for c in prefix) + "*"
+        for key in self._client.scan_iter(match=pattern):
+            self._client.delete(key)
+
+
+_store = None
+_local = None
+
+
+def create_store():
+    """Build the store selected by STORE_BACKEND (memory, sqlite or redis)."""
+    backend = settings.STORE_BACKEND.lower()
+    if backend == "redis":
+        return RedisStore(settings.STORE_URL or "redis://localhost:6379/0")
+    if backend == "sqlite" and (settings.STORE_URL or settings.CACHE_DIR):
+        return SQLiteStore(settings.STORE_URL or os.path.join(settings.CACHE_DIR, "store.sqlite"), settings.STORE_MAX_ENTRIES)
+    if backend not in ("memory", "sqlite"):
+        logger.warning(f"Unknown STORE_BACKEND {settings.STORE_BACKEND}, using memory")
+    return MemoryStore(settings.STORE_MAX_ENTRIES)
+
+
+def get_store():
+    """Return the process wide store, created on first use (so each worker opens its own connection)."""
+    global _store
+    if _store is None:
+        try:
+            _store = create_store()
+        except Exception as e:
+            logger.error(f"Unable to open {settings.STORE_BACKEND} store, using memory: {e}")
+            _store = MemoryStore(settings.STORE_MAX_ENTRIES)
+    return _store
+
+
+def get_secret_store():
+    """
+    Store for secrets such as access tokens: the shared store unless it writes
+    to disk (SQLite), in which case secrets stay in this process' memory.
+    """
+    global _local
+    store = get_store()
+    if not isinstance(store, SQLiteStore):
+        return store
+    if _local is None:
+        _local = MemoryStore(settings.STORE_MAX_ENTRIES)
+    return _local
@@ -0,0 +1,30 @@
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+# Keep caches in memory and out of the working tree, before core.config is imported
+os.environ["STORE_BACKEND"] = "memory"
+os.environ["CACHE_DIR"] = ""
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+@pytest.fixture
+def http_server():
+    """Start local HTTP servers: http_server(HandlerClass) returns its base URL."""
+    servers = []
+
+    def start(handler_class) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import tools.azure.vision as vision
+from core.config import settings
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"pixels" * 100
+
+
+class VisionStub(BaseHTTPRequestHandler):
+    """Azure Vision analyze endpoint, and images to download from the same host."""
+
+    lock = threading.Lock()
+    analyses = 0
+    delay = 0.0
+    fail = False
+    images = {
+        "/images/a.png": (PNG, "image/png"),
+        "/images/copy-of-a.png": (PNG, "image/png"),
+        "/images/b.png": (PNG + b"other", "image/png"),
+        "/page.html": (b"<html><body>not an image</body></html>", "text/html; charset=utf-8"),
+        "/huge.png": (b"\x89PNG" + b"0" * 5000, "image/png"),
+    }
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path not in self.images:
+            self.send_error(404)
+            return
+        body, content_type = self.images[self.path]
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        # Chunked, so the size cap cannot rely on Content-Length
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for start in range(0, len(body), 1024):
+            chunk = body[start:start + 1024]
+            self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_POST(self):
+        image = self.rfile.read(int(self.headers["Content-Length"]))
+        with self.lock:
+            type(self).analyses += 1
+        if self.delay:
+            threading.Event().wait(self.delay)
+        if self.fail:
+            body, status = {"error": {"code": "InvalidRequest", "message": "Image format is not valid"}}, 400
+        else:
+            body, status = {
+                "modelVersion": "2023-10-01",
+                "metadata": {"width": 640, "height": 480},
+                "captionResult": {"text": "a stub image", "confidence": 0.9},
+                "readResult": {"blocks": [{"lines": [
+                    {"text": f"{len(image)} bytes", "boundingPolygon": [{"x": 0, "y": 0}] * 4, "words": []}
+                ]}]},
+            }, 200
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def stub(http_server, monkeypatch):
+    handler = type("Stub", (VisionStub,), {"analyses": 0})
+    base = http_server(handler)
+    monkeypatch.setattr(settings, "VISION_ENDPOINT", base)
+    monkeypatch.setattr(settings, "VISION_KEY", "test")
+    # Clients are bound to the event loop of the test that created them
+    monkeypatch.setattr(vision, "_client", None)
+    monkeypatch.setattr(vision, "_http", None)
+    monkeypatch.setattr(vision, "_cache", type(vision._cache)())
+    monkeypatch.setattr(vision, "_inflight", {})
+    handler.base = base
+    return handler
+
+
+def run(coro):
+    """asyncio.run closing the clients in the loop they were created in."""
+    async def main():
+        try:
+            return await coro
+        finally:
+            if vision._client is not None:
+                await vision._client.close()
+            if vision._http is not None:
+                await vision._http.aclose()
+    return asyncio.run(main())
+
+
+def test_same_bytes_at_two_urls_are_analyzed_once(stub):
+    async def analyze():
+        return [await vision.get_image_analysis(f"{stub.base}/images/{name}") for name in ("a.png", "copy-of-a.png", "b.png")]
+
+    a, copy, b = run(analyze())
+
+    assert a == copy == {"caption": "a stub image", "read": [{"line": f"{len(PNG)} bytes"}]}
+    assert b["read"] == [{"line": f"{len(PNG) + 5} bytes"}]
+    assert stub.analyses == 2
+
+
+def test_concurrent_calls_share_one_analysis(stub):
+    stub.delay = 0.2
+    urls = [f"{stub.base}/images/a.png", f"{stub.base}/images/copy-of-a.png"] * 3
+
+    result = run(vision.get_images_analysis(urls, max_concurrency=6))
+
+    assert [r["url"] for r in result["results"]] == urls
+    assert all(r["caption"] == "a stub image" for r in result["results"])
+    assert stub.analyses == 1
+
+
+def test_errors_are_returned_as_entries(stub, monkeypatch):
+    monkeypatch.setattr(vision, "MAX_IMAGE_BYTES", 4096)
+    urls = [f"{stub.base}/{path}" for path in ("missing.png", "page.html", "huge.png", "images/a.png")]
+
+    result = run(vision.get_images_analysis(urls))
+
+    missing, page, huge, ok = result["results"]
+    assert "404" in missing["error"]
+    assert "Not an image: text/html" in page["error"]
+    assert "larger than" in huge["error"]
+    assert ok["caption"] == "a stub image"
+    # Neither the page nor the oversized image reached Vision
+    assert stub.analyses == 1
+
+
+def test_vision_errors_are_returned_and_not_cached(stub):
+    stub.fail = True
+    url = f"{stub.base}/images/a.png"
+
+    async def analyze():
+        return [await vision.get_image_analysis(url) for _ in range(2)]
+
+    first, second = run(analyze())
+
+    assert "Image format is not valid" in first["error"] and "error" in second
+    assert stub.analyses == 2
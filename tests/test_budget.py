@@ -0,0 +1,113 @@
+import pytest
+
+import core.budget as budget
+from core.budget import count_tokens, truncate_diff, truncate_patches, truncate_rows, truncate_text
+
+# Room for the "... (N characters truncated) ..." marker and the line breaks around it
+MARKER_TOKENS = 15
+
+
+def test_text_within_budget_is_unchanged():
+    assert truncate_text("short text", 100) == "short text"
+    assert truncate_text("x" * 10000, 0) == "x" * 10000
+
+
+def test_single_long_line_keeps_head_and_tail():
+    text = "".join(f"word{i} " for i in range(5000))
+
+    result = truncate_text(text, 200)
+
+    assert count_tokens(result) <= 200 + MARKER_TOKENS
+    assert result.startswith("word0 word1 ") and result.endswith("word4999 ")
+    assert "characters truncated" in result
+
+
+def test_huge_line_in_a_multi_line_text_is_cut_not_dropped():
+    huge = "".join(f"item{i}," for i in range(20000))
+    text = "first line\n" + huge + "\nlast line"
+
+    result = truncate_text(text, 1000)
+
+    assert count_tokens(result) <= 1000 + MARKER_TOKENS
+    # The budget is spent on the huge line instead of just "first line" and "last line"
+    assert count_tokens(result) >= 800
+    assert result.startswith("first line\nitem0,item1,") and result.endswith("item19999,\nlast line")
+
+
+def test_huge_line_is_not_repeated_in_head_and_tail():
+    huge = "".join(f"{i:05d}" for i in range(20000))
+
+    result = truncate_text("a\n" + huge + "\nb", 500)
+
+    lines = result.split("\n")
+    assert lines[0] == "a" and lines[-1] == "b" and "characters truncated" in lines[2]
+    head, tail = lines[1], lines[3]
+    assert huge.startswith(head) and huge.endswith(tail)
+    assert len(head) + len(tail) <= len(huge)
+
+
+@pytest.mark.parametrize("unit", ["漢字かな交じり文", "😀🎉👍🏽", "Grüße, Ünïcödé "])
+def test_multibyte_text(unit):
+    text = "\n".join(unit * 20 for _ in range(400))
+
+    result = truncate_text(text, 300)
+
+    assert count_tokens(result) <= 300 + MARKER_TOKENS
+    assert result.startswith(unit) and result.endswith(unit)
+    result.encode("utf-8")  # No split surrogate pairs
+
+
+def test_diff_keeps_every_hunk_header():
+    hunks = [f"@@ -{i * 100},50 +{i * 100},50 @@ def function_{i}():" for i in range(10)]
+    patch = "\n".join(header + "\n" + "\n".join(f"+    value_{i}_{j} = compute({j})" for j in range(50))
+                      for i, header in enumerate(hunks))
+
+    result = truncate_diff(patch, 300)
+
+    assert [line for line in result.split("\n") if line.startswith("@@")] == hunks
+    assert "lines truncated" in result
+    assert count_tokens(result) < count_tokens(patch) // 4
+
+
+def test_small_patches_roll_their_budget_over_to_a_large_one():
+    large = "@@ -1,2000 +1,2000 @@\n" + "\n".join(f"+line {i} of the large file" for i in range(2000))
+    small = ["@@ -1 +1 @@\n-old\n+new"] * 11
+
+    result = truncate_patches([large] + small + [None], 1200)
+
+    assert result[1:] == small + [None]
+    # Far more than the 1/12 an even split would give
+    assert count_tokens(result[0]) > 1200 * 3 // 4
+    assert count_tokens("\n".join(result[:-1])) <= 1200 + 12 * MARKER_TOKENS
+    assert truncate_patches([large], 0) == [large]
+
+
+def test_rows_keep_head_tail_and_a_marker():
+    rows = [{"id": i, "name": f"user {i}"} for i in range(1000)]
+
+    result = truncate_rows(rows, 500)
+
+    marker = next(i for i, row in enumerate(result) if isinstance(row, str))
+    head, tail = result[:marker], result[marker + 1:]
+    assert head == rows[:len(head)] and tail == rows[len(rows) - len(tail):]
+    assert len(head) > len(tail) > 0
+    assert result[marker] == f"... ({1000 - len(head) - len(tail)} rows truncated) ..."
+    assert truncate_rows(rows[:3], 500) == rows[:3]
+
+
+def test_length_estimate_when_no_tokenizer_loads(monkeypatch):
+    class Broken:
+        @staticmethod
+        def get_encoding(name):
+            raise OSError("encoding file cannot be downloaded")
+
+    monkeypatch.setattr(budget, "tiktoken", Broken)
+    budget.get_encoding.cache_clear()
+    try:
+        assert count_tokens("abcdefgh") == 2
+        assert count_tokens("abcdefghi") == 3
+        result = truncate_text("\n".join(f"line {i}" for i in range(1000)), 100)
+        assert result.startswith("line 0\n") and "lines truncated" in result
+        assert len(result) <= 100 * budget.CHARS_PER_TOKEN + 4 * MARKER_TOKENS
+    finally:
+        budget.get_encoding.cache_clear()
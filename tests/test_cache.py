@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import core.cache
+from core.cache import TTLCache
+from core.store import MemoryStore
+from tools.registry import TOOLS, lazy_tool
+
+
+class SlowStore(MemoryStore):
+    """Memory store answering like a remote one (blocking calls)."""
+
+    delay = 0.2
+
+    def get(self, key):
+        time.sleep(self.delay)
+        return super().get(key)
+
+    def set(self, key, value, ttl=None):
+        time.sleep(self.delay)
+        super().set(key, value, ttl)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = MemoryStore()
+    monkeypatch.setattr(core.cache, "get_store", lambda: store)
+    return store
+
+
+def test_concurrent_misses_share_one_fetch(store):
+    cache = TTLCache("test:coalesce", ttl=60)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_fetch("key", fetch) for _ in range(10)))
+
+    assert asyncio.run(run()) == ["value"] * 10
+    assert len(calls) == 1
+    assert cache.stats["misses"] == 1 and cache.stats["coalesced"] == 9
+
+
+def test_stale_value_is_served_when_fetch_fails(store):
+    cache = TTLCache("test:stale", ttl=60)
+    cache.set("key", "old")
+    cache._memory["key"] = ("old", time.time() - 1)
+    store.set("test:stale:key", ["old", time.time() - 1])
+
+    async def failing():
+        raise RuntimeError("upstream down")
+
+    assert asyncio.run(cache.get_or_fetch("key", failing)) == "old"
+
+
+def test_values_rejected_by_should_cache_are_not_stored(store):
+    cache = TTLCache("test:should_cache", ttl=60, should_cache=lambda value: "error" not in value)
+
+    async def run():
+        await cache.get_or_fetch("key", lambda: asyncio.sleep(0, {"error": "boom"}))
+        return await cache.get_or_fetch("key", lambda: asyncio.sleep(0, {"ok": True}))
+
+    assert asyncio.run(run()) == {"ok": True}
+    assert cache.stats["misses"] == 2
+
+
+def test_store_calls_do_not_block_the_event_loop(monkeypatch):
+    store = SlowStore()
+    monkeypatch.setattr(core.cache, "get_store", lambda: store)
+    cache = TTLCache("test:slow_store", ttl=60)
+    ticks = []
+
+    async def ticker(deadline):
+        while time.monotonic() < deadline:
+            start = time.monotonic()
+            await asyncio.sleep(0.01)
+            ticks.append(time.monotonic() - start)
+
+    async def run():
+        deadline = time.monotonic() + 0.6
+        ticking = asyncio.ensure_future(ticker(deadline))
+        value = await cache.get_or_fetch("key", lambda: asyncio.sleep(0, "value"))
+        await ticking
+        return value
+
+    assert asyncio.run(run()) == "value"
+    # A store read and a store write of 0.2 s each happened while the loop kept ticking
+    assert max(ticks) < 0.1
+
+
+def test_purge_reaches_other_workers(store, monkeypatch):
+    monkeypatch.setattr(core.cache, "GENERATION_CHECK_INTERVAL", 0)
+    # Two workers: same namespace, same shared store, separate memory
+    worker_a = TTLCache("test:purge", ttl=60)
+    worker_b = TTLCache("test:purge", ttl=60)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return f"value {len(calls)}"
+
+    async def run():
+        first = await worker_a.get_or_fetch("key", fetch)
+        from_store = await worker_b.get_or_fetch("key", fetch)
+        worker_a.purge("key")
+        after_purge = await worker_b.get_or_fetch("key", fetch)
+        return first, from_store, after_purge
+
+    assert asyncio.run(run()) == ("value 1", "value 1", "value 2")
+    assert len(calls) == 2
+
+
+def test_admin_tools_touch_memory_from_the_event_loop(store, monkeypatch):
+    cache = TTLCache("test:admin", ttl=60)
+    cache.set("key", "value")
+    threads = []
+    purge_memory = cache._purge_memory
+
+    def recording(key):
+        threads.append(threading.get_ident())
+        return purge_memory(key)
+
+    monkeypatch.setattr(cache, "_purge_memory", recording)
+    tools = {spec.name: lazy_tool(spec) for spec in TOOLS if spec.name in ("inspect_cache", "purge_cache")}
+
+    async def run():
+        before = await tools["inspect_cache"](cache="test:admin")
+        purged = await tools["purge_cache"](cache="test:admin", key="key")
+        return before, purged
+
+    before, purged = asyncio.run(run())
+    assert before["entries"][0]["key"] == "key"
+    assert purged == {"purged": 1}
+    assert threads == [threading.get_ident()]
+    assert store.get("test:admin:key") is None
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import tools.utils.crawler as crawler
+from tools.utils.crawler import canonicalize_url, crawl_websites
+
+ROBOTS = "User-agent: *\nDisallow: /private\n"
+
+
+def make_handler(delay: float = 0.0):
+    """Site serving /robots.txt and HTML pages, recording requests and the peak of concurrent page requests."""
+
+    class Site(BaseHTTPRequestHandler):
+        lock = threading.Lock()
+        paths = []
+        active = 0
+        peak = 0
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            cls = type(self)
+            with cls.lock:
+                cls.paths.append(self.path)
+            if self.path == "/robots.txt":
+                return self.reply(ROBOTS, "text/plain")
+
+            with cls.lock:
+                cls.active += 1
+                cls.peak = max(cls.peak, cls.active)
+            try:
+                if delay:
+                    time.sleep(delay)
+                path = self.path.split("?")[0]
+                canonical = '<link rel="canonical" href="/article">' if path.startswith("/copy") else ""
+                self.reply(f"<html><head>{canonical}<title>{path}</title></head>"
+                           f"<body><main><h1>Page {path}</h1><p>Content of {path}</p></main></body></html>", "text/html")
+            finally:
+                with cls.lock:
+                    cls.active -= 1
+
+        def reply(self, text: str, content_type: str):
+            body = text.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Site
+
+
+@pytest.fixture(autouse=True)
+def fresh_robots(monkeypatch):
+    monkeypatch.setattr(crawler, "_robots", {})
+    monkeypatch.setattr(crawler, "_robots_locks", {})
+
+
+def crawl(**kwargs) -> dict:
+    return asyncio.run(crawl_websites(max_tokens=0, **kwargs))
+
+
+def test_canonicalize_url():
+    assert canonicalize_url("HTTP://Example.com:80/a/?utm_source=x&b=2&a=1#top") == "http://example.com/a?a=1&b=2"
+    assert canonicalize_url("https://example.com") == canonicalize_url("https://example.com/")
+
+
+def test_duplicate_urls_are_fetched_once(http_server):
+    site = make_handler()
+    base = http_server(site)
+
+    result = crawl(urls=[f"{base}/page", f"{base}/page/?utm_source=mail", f"{base}/page#section"])
+
+    assert [r["url"] for r in result["results"]] == [f"{base}/page"]
+    assert [s["reason"] for s in result["skipped"]] == ["duplicate", "duplicate"]
+    assert site.paths.count("/page") == 1
+
+
+def test_pages_declaring_the_same_canonical_are_deduplicated(http_server):
+    base = http_server(make_handler())
+
+    result = crawl(urls=[f"{base}/copy-1", f"{base}/copy-2", f"{base}/other"])
+
+    assert len(result["results"]) == 2
+    assert {r["canonical"] for r in result["results"]} == {f"{base}/article", None}
+    assert result["skipped"][0]["reason"] == "duplicate"
+    assert result["skipped"][0]["url"] in (f"{base}/copy-1", f"{base}/copy-2")
+
+
+def test_robots_disallow_and_cache(http_server):
+    site = make_handler()
+    base = http_server(site)
+
+    first = crawl(urls=[f"{base}/private/page", f"{base}/public"])
+    second = crawl(urls=[f"{base}/public/again"])
+
+    assert [r["url"] for r in first["results"]] == [f"{base}/public"]
+    assert first["skipped"] == [{"url": f"{base}/private/page", "reason": "robots.txt"}]
+    assert "/private/page" not in site.paths
+    assert len(second["results"]) == 1
+    # Fetched once for both crawls (ROBOTS_TTL)
+    assert site.paths.count("/robots.txt") == 1
+
+
+def test_per_host_concurrency_cap(http_server):
+    slow, other = make_handler(delay=0.2), make_handler(delay=0.2)
+    base, other_base = http_server(slow), http_server(other)
+
+    start = time.monotonic()
+    result = crawl(urls=[f"{base}/p{i}" for i in range(6)] + [f"{other_base}/p{i}" for i in range(2)],
+                   per_host=2, max_concurrency=8)
+
+    assert len(result["results"]) == 8
+    assert slow.peak == 2
+    assert other.peak == 2
+    # 6 pages two at a time on the first host, the second host runs alongside
+    assert time.monotonic() - start < 6 * 0.2
+
+
+def test_unreachable_url_gives_an_error_entry(http_server):
+    base = http_server(make_handler())
+
+    result = crawl(urls=[f"{base}/ok", "http://127.0.0.1:1/down"])
+
+    errors = [r for r in result["results"] if "error" in r]
+    assert [r["url"] for r in errors] == ["http://127.0.0.1:1/down"]
+    assert any(r["url"] == f"{base}/ok" and "Content of /ok" in r["content"] for r in result["results"])
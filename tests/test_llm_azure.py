@@ -0,0 +1,159 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import tools.llm.azure as llm
+from core.config import settings
+
+CHUNKS = ["Hello", " from", " the", " stub"]
+
+
+class OpenAIStub(BaseHTTPRequestHandler):
+    """Streams CHUNKS as chat completion chunks, after answering `rate_limited` requests with 429."""
+
+    lock = threading.Lock()
+    requests = 0
+    rate_limited = 0
+    retry_after = "0.2"
+    delay = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with self.lock:
+            type(self).requests += 1
+            limited = type(self).requests <= self.rate_limited
+        if limited:
+            body = json.dumps({"error": {"code": "429", "message": "Rate limit"}}).encode()
+            self.send_response(429)
+            self.send_header("Retry-After", self.retry_after)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for part in CHUNKS:
+            chunk = {"id": "stub", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o-mini",
+                     "choices": [{"index": 0, "delta": {"content": part}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            if self.delay:
+                threading.Event().wait(self.delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+class FakeContext:
+    def __init__(self):
+        self.progress = []
+
+    async def report_progress(self, progress, total=None, message=None):
+        self.progress.append((progress, message))
+
+
+class DisconnectedContext:
+    calls = 0
+
+    async def report_progress(self, progress, total=None, message=None):
+        self.calls += 1
+        raise ConnectionResetError("client disconnected")
+
+
+@pytest.fixture
+def stub(http_server, monkeypatch):
+    handler = type("Stub", (OpenAIStub,), {"requests": 0})
+    monkeypatch.setattr(settings, "AZURE_OPENAI_ENDPOINT", http_server(handler))
+    monkeypatch.setattr(settings, "AZURE_OPENAI_KEY", "test")
+    monkeypatch.setattr(llm, "_client", None)
+    llm._cache.purge()
+    yield handler
+    llm._cache.purge()
+
+
+def test_streams_progress(stub):
+    ctx = FakeContext()
+    response = asyncio.run(llm.get_azure_openai_response("hi", ctx=ctx))
+
+    assert response == "".join(CHUNKS)
+    assert ctx.progress == [(i + 1, part) for i, part in enumerate(CHUNKS)]
+
+
+def test_retries_after_429_honoring_retry_after(stub):
+    stub.rate_limited = 2
+    stub.retry_after = "0.3"
+    elapsed = []
+
+    async def run():
+        start = asyncio.get_running_loop().time()
+        response = await llm.get_azure_openai_response("hi")
+        elapsed.append(asyncio.get_running_loop().time() - start)
+        return response
+
+    assert asyncio.run(run()) == "".join(CHUNKS)
+    assert stub.requests == 3
+    # Two waits of Retry-After, not the exponential backoff
+    assert 0.6 <= elapsed[0] < 2
+
+
+def test_gives_up_after_max_retries(stub, monkeypatch):
+    monkeypatch.setattr(llm, "MAX_RETRIES", 1)
+    stub.rate_limited = 10
+    stub.retry_after = "0"
+
+    assert asyncio.run(llm.get_azure_openai_response("hi")) is None
+    assert stub.requests == 2
+
+
+def test_temperature_zero_is_cached(stub):
+    hits = llm._cache.stats["hits"]
+
+    async def run():
+        first = await llm.get_azure_openai_response("hi", temperature=0)
+        second = await llm.get_azure_openai_response("hi", temperature=0)
+        return first, second
+
+    assert asyncio.run(run()) == ("".join(CHUNKS),) * 2
+    assert stub.requests == 1
+    assert llm._cache.stats["hits"] == hits + 1
+
+
+def test_sampled_responses_are_not_cached(stub):
+    async def run():
+        await llm.get_azure_openai_response("hi", temperature=0.7)
+        await llm.get_azure_openai_response("hi", temperature=0.7)
+
+    asyncio.run(run())
+    assert stub.requests == 2
+
+
+def test_duplicate_prompts_in_batch_share_one_request(stub):
+    stub.delay = 0.05
+    result = asyncio.run(llm.get_azure_openai_responses(["same"] * 5 + ["other"], temperature=0))
+
+    assert result["responses"] == ["".join(CHUNKS)] * 6
+    assert stub.requests == 2
+
+
+def test_disconnected_first_caller_does_not_fail_the_shared_completion(stub):
+    stub.delay = 0.05
+    gone = DisconnectedContext()
+
+    async def run():
+        return await asyncio.gather(
+            llm.get_azure_openai_response("same", temperature=0, ctx=gone),
+            llm.get_azure_openai_response("same", temperature=0),
+        )
+
+    assert asyncio.run(run()) == ["".join(CHUNKS)] * 2
+    assert stub.requests == 1
+    # Progress stops after the first failure
+    assert gone.calls == 1
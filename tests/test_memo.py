@@ -0,0 +1,65 @@
+import asyncio
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler
+
+from core.cache import TTLCache
+from core.memo import CachePolicy, is_cacheable, memoize
+from tools.registry import TOOLS, lazy_tool
+from tools.utils import web
+
+
+def test_is_cacheable():
+    assert is_cacheable("text")
+    assert is_cacheable({"files": []})
+    assert not is_cacheable(None)
+    assert not is_cacheable({"error": "Not Found"})
+    assert not is_cacheable({"type": "error", "message": "Not Found"})
+
+
+def test_memoize_ignores_ctx_and_skips_errors():
+    calls = []
+
+    def tool(value, ctx=None):
+        calls.append(value)
+        return {"error": "boom"} if value == "bad" else {"value": value}
+
+    memoized = memoize(tool, CachePolicy(ttl=60), "test_memoize")
+
+    async def run():
+        await memoized(value="good", ctx=object())
+        await memoized(value="good", ctx=object())
+        await memoized(value="bad")
+        await memoized(value="bad")
+
+    asyncio.run(run())
+    assert calls == ["good", "bad", "bad"]
+
+
+def test_website_content_follows_cache_control(http_server, monkeypatch):
+    monkeypatch.setattr(web, "_cache", OrderedDict())
+    requests = []
+
+    class Page(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            requests.append(self.path)
+            body = f"<html><body><p>Visit {len(requests)}</p></body></html>".encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Cache-Control", "no-store")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    url = http_server(Page)
+    spec = next(spec for spec in TOOLS if spec.name == "get_website_content")
+    tool = lazy_tool(spec)
+
+    async def run():
+        return [await tool(url=url) for _ in range(2)]
+
+    first, second = asyncio.run(run())
+    assert "Visit 1" in first and "Visit 2" in second
+    assert "tool:get_website_content" not in TTLCache.instances
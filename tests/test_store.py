@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+import core.store
+from core.store import MemoryStore, SQLiteStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(max_entries=0):
+        if request.param == "memory":
+            return MemoryStore(max_entries)
+        return SQLiteStore(str(tmp_path / "store.sqlite"), max_entries)
+    return make
+
+
+def rows(store) -> int:
+    if isinstance(store, MemoryStore):
+        return len(store._data)
+    return store._conn.execute("SELECT COUNT(*) FROM store").fetchone()[0]
+
+
+def test_oldest_entries_are_evicted_over_the_cap(make_store, monkeypatch):
+    monkeypatch.setattr(core.store, "SWEEP_WRITES", 1)
+    store = make_store(max_entries=3)
+    for i in range(5):
+        store.set(f"key{i}", i)
+    # Rewriting a key makes it the newest
+    store.set("key2", "again")
+    store.set("key5", 5)
+
+    assert rows(store) == 3
+    assert [store.get(f"key{i}") for i in range(6)] == [None, None, "again", None, 4, 5]
+
+
+def test_expired_entries_are_swept_without_being_read(make_store, monkeypatch):
+    store = make_store()
+    store.set("short", 1, ttl=0.01)
+    store.set("long", 2, ttl=60)
+    time.sleep(0.02)
+    monkeypatch.setattr(core.store, "SWEEP_INTERVAL", 0)
+    store.set("other", 3)
+
+    assert rows(store) == 2
+    assert store.get("long") == 2
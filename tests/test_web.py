@@ -0,0 +1,112 @@
+import threading
+from collections import OrderedDict
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import tools.utils.web as web
+from tools.utils.web import decode_body, detect_encoding, fetch
+
+LAST_MODIFIED = formatdate(0, usegmt=True)
+
+
+class Page(BaseHTTPRequestHandler):
+    """Serves `body` with `headers`, answering 304 to matching conditional requests."""
+
+    lock = threading.Lock()
+    body = b"<html><body>page</body></html>"
+    headers_out = {}
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.requests.append(dict(self.headers))
+        etag, modified = cls.headers_out.get("ETag"), cls.headers_out.get("Last-Modified")
+        if (etag and self.headers.get("If-None-Match") == etag) or \
+                (modified and self.headers.get("If-Modified-Since") == modified):
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        for name, value in {"Content-Type": "text/html", **cls.headers_out}.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(cls.body)))
+        self.end_headers()
+        self.wfile.write(cls.body)
+
+
+@pytest.fixture
+def page(http_server, monkeypatch):
+    monkeypatch.setattr(web, "_cache", OrderedDict())
+
+    def serve(body: bytes = Page.body, **headers) -> tuple:
+        handler = type("Page", (Page,), {"body": body, "headers_out": headers, "requests": []})
+        return handler, http_server(handler) + "/page"
+    return serve
+
+
+def test_max_age_is_served_from_cache(page):
+    handler, url = page(**{"Cache-Control": "max-age=60"})
+
+    first, second = fetch(url), fetch(url)
+
+    assert second is first
+    assert len(handler.requests) == 1
+
+
+@pytest.mark.parametrize("validator", [{"ETag": '"v1"'}, {"Last-Modified": LAST_MODIFIED}])
+def test_stale_entry_is_revalidated(page, validator):
+    handler, url = page(**{"Cache-Control": "max-age=0", **validator})
+
+    first, second = fetch(url), fetch(url)
+
+    assert second.body == first.body
+    assert len(handler.requests) == 2
+    header, value = ("If-None-Match", '"v1"') if "ETag" in validator else ("If-Modified-Since", LAST_MODIFIED)
+    assert header not in handler.requests[0] and handler.requests[1][header] == value
+
+
+@pytest.mark.parametrize("cache_control", ["no-store", "no-store, max-age=60"])
+def test_no_store_is_not_cached(page, cache_control):
+    handler, url = page(**{"Cache-Control": cache_control, "ETag": '"v1"'})
+
+    fetch(url), fetch(url)
+
+    assert len(handler.requests) == 2
+    assert "If-None-Match" not in handler.requests[1]
+
+
+def test_body_is_cut_at_max_bytes(page):
+    handler, url = page(b"x" * 300_000, **{"Cache-Control": "max-age=60"})
+
+    result = fetch(url, max_bytes=100_000)
+
+    assert result.truncated and len(result.body) == 100_000
+    # Truncated bodies are not cached
+    fetch(url, max_bytes=100_000)
+    assert len(handler.requests) == 2
+
+
+def test_encoding_from_header_meta_and_sniffing(page):
+    latin1 = "<html><body>Café crème brûlée, à la française, naïve façade.</body></html>".encode("latin-1")
+
+    assert detect_encoding(latin1, "text/html; charset=ISO-8859-1") == "iso-8859-1"
+    assert detect_encoding(b'<meta charset="windows-1252"><p>x</p>', "text/html") == "windows-1252"
+    assert detect_encoding(b'<meta http-equiv="Content-Type" content="text/html; charset=Shift_JIS">') == "shift_jis"
+    assert detect_encoding("<p>déjà vu</p>".encode()) == "utf-8"
+    assert detect_encoding(b"\xef\xbb\xbf<p>bom</p>") == "utf-8-sig"
+
+    # Latin-1 page without charset in the header nor a <meta>
+    _, url = page(latin1 * 20)
+    result = fetch(url)
+    assert result.encoding != "utf-8"
+    assert "Café crème brûlée" in decode_body(result.body, result.encoding)
+
+
+def test_unknown_charset_falls_back_to_utf8():
+    assert decode_body("é".encode(), "not-a-charset") == "é"
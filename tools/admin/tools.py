@@ -0,0 +1,49 @@
+from typing import Optional
+
+from core.cache import TTLCache
+from core.logger import logger
+
+
+async def inspect_cache(cache: Optional[str] = None) -> dict:
+    """
+    Show the statistics of the caches of this worker.
+
+    Async so it runs on the event loop, which owns the memory level of the caches.
+
+    Args:
+        cache: Cache name (e.g. "tool:get_file_structure"), all caches if empty
+
+    Returns:
+        dict with:
+          - "caches": {name: {hits, stale, coalesced, misses, errors, hit_rate, size, maxsize, ttl}}
+          - "entries": list of {key, expires_in} when a cache is given
+    """
+    if cache:
+        instance = TTLCache.instances.get(cache)
+        if instance is None:
+            return {"error": f"Unknown cache {cache}, loaded caches: {', '.join(sorted(TTLCache.instances))}"}
+        return {"caches": {cache: instance.summary()}, "entries": instance.entries()}
+
+    return {"caches": {name: instance.summary() for name, instance in sorted(TTLCache.instances.items())}}
+
+
+async def purge_cache(cache: str, key: Optional[str] = None) -> dict:
+    """
+    Remove one entry, or every entry, of a cache from the shared store and this
+    worker's memory. The other workers drop their memory within a second.
+
+    Args:
+        cache: Cache name (e.g. "tool:get_file_structure")
+        key:   Entry key as shown by inspect_cache, all entries if empty
+
+    Returns:
+        dict with:
+          - "purged": number of entries removed from this worker's memory
+    """
+    instance = TTLCache.instances.get(cache)
+    if instance is None:
+        return {"error": f"Unknown cache {cache}, loaded caches: {', '.join(sorted(TTLCache.instances))}"}
+
+    purged = await instance.purge_async(key or None)
+    logger.info(f"Purged {cache} ({key or 'all entries'})")
+    return {"purged": purged}
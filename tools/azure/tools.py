@@ -1,6 +1,11 @@
 import requests
+from core.budget import resolve_budget, truncate_rows
 from core.config import settings
 from core.logger import logger
+from core.store import get_secret_store
+
+# Tokens are renewed this many seconds before they expire
+TOKEN_EXPIRY_MARGIN = 300
 
 def fetch_azure_ad_token(scope: str) -> dict:
     """
@@ -13,6 +18,12 @@ def fetch_azure_ad_token(scope: str) -> dict:
         On success: {"access_token": "...", "expires_in": 3599, ...}
         On failure: {"error": "...", "error_description": "..."}
     """
+    # Tokens are reused until they expire, and shared by the workers unless the store is on disk
+    cache_key = f"azure_ad_token:{scope}"
+    cached = get_secret_store().get(cache_key)
+    if cached is not None:
+        return cached
+
     # 1. Read credentials
     client_id = settings.AZURE_CLIENT_ID
     client_secret = settings.AZURE_CLIENT_SECRET
@@ -23,7 +34,7 @@ def fetch_azure_ad_token(scope: str) -> dict:
         return None
 
     # 2. Token endpoint URL
-    token_url = f"https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
+    token_url = f"{settings.AZURE_LOGIN_URL}/{tenant_id}/oauth2/v2.0/token"
 
     # 3. Build payload
     payload = {
@@ -48,15 +59,19 @@ def fetch_azure_ad_token(scope: str) -> dict:
         return None
 
     # Success: return the full token response (access_token, expires_in, etc.)
+    ttl = int(data.get("expires_in", 0)) - TOKEN_EXPIRY_MARGIN
+    if ttl > 0:
+        get_secret_store().set(cache_key, data, ttl)
     return data
 
-def run_log_analytics_query(workspace: str, query: str) -> dict:
+def run_log_analytics_query(workspace: str, query: str, max_tokens: int = None) -> dict:
     """
     Execute a Log Analytics query against a given workspace.
 
     Args:
         workspace: Log Analytics workspace ID
         query:     KQL query string
+        max_tokens: Token budget for the rows (default: OUTPUT_MAX_TOKENS, 0 for unlimited)
 
     Returns:
         On success: parsed JSON response from Log Analytics
@@ -68,7 +83,7 @@ def run_log_analytics_query(workspace: str, query: str) -> dict:
         return None
     
     token = token.get("access_token")
-    url = f"https://api.loganalytics.io/v1/workspaces/{workspace}/query"
+    url = f"{settings.LOG_ANALYTICS_URL}/v1/workspaces/{workspace}/query"
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
@@ -86,4 +101,11 @@ def run_log_analytics_query(workspace: str, query: str) -> dict:
         logger.error(data.get("error_description", "Unknown error"))
         return None
 
+    # Share the budget between the result tables, keeping head and tail rows
+    tables = data.get("tables", [])
+    budget = resolve_budget(max_tokens)
+    share = max(1, budget // len(tables)) if budget and tables else 0
+    for table in tables:
+        table["rows"] = truncate_rows(table.get("rows"), share)
+
     return data
\ No newline at end of file
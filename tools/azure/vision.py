@@ -1,18 +1,49 @@
-from azure.ai.vision.imageanalysis import ImageAnalysisClient
+import asyncio
+import hashlib
+from collections import OrderedDict
+
+import httpx
+from azure.ai.vision.imageanalysis.aio import ImageAnalysisClient
 from azure.ai.vision.imageanalysis.models import VisualFeatures
 from azure.core.credentials import AzureKeyCredential
 from core.config import settings
+from core.logger import logger
+
+# Number of analyses kept in the content-hash cache
+CACHE_SIZE = 512
+# Azure Vision rejects larger images, stop the download there
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+# Servers often label images as a generic binary
+IMAGE_CONTENT_TYPES = ("image/", "application/octet-stream")
+
+_client = None
+_http = None
+_cache: "OrderedDict[str, dict]" = OrderedDict()
+_inflight: dict = {}
+
 
+def get_client() -> ImageAnalysisClient:
+    """Create the async Vision client on first use so importing this module needs no credentials."""
+    global _client
+    if _client is None:
+        _client = ImageAnalysisClient(
+            endpoint=settings.VISION_ENDPOINT,
+            credential=AzureKeyCredential(settings.VISION_KEY)
+        )
+    return _client
 
-client = ImageAnalysisClient(
-    endpoint=settings.VISION_ENDPOINT,
-    credential=AzureKeyCredential(settings.VISION_KEY)
-)
 
-def get_image_analysis(image_url: str) -> dict:
-    # Get a caption for the image. This will be a synchronously (blocking) call.
-    result = client.analyze_from_url(
-        image_url=image_url,
+def get_http_client() -> httpx.AsyncClient:
+    """Shared HTTP client used to download images (keeps connections alive between calls)."""
+    global _http
+    if _http is None:
+        _http = httpx.AsyncClient(timeout=30, follow_redirects=True)
+    return _http
+
+
+async def _analyze_bytes(data: bytes) -> dict:
+    result = await get_client().analyze(
+        image_data=data,
         visual_features=[VisualFeatures.CAPTION, VisualFeatures.READ],
         gender_neutral_caption=True,  # Optional (default is False)
     )
@@ -23,7 +54,100 @@ def get_image_analysis(image_url: str) -> dict:
             {
                 "line": line.text
             }
-            for block in result.read.blocks
+            for block in (result.read.blocks if result.read is not None else [])
             for line in block.lines
         ]
-    }
\ No newline at end of file
+    }
+
+
+async def _analyze_and_cache(digest: str, data: bytes) -> dict:
+    result = await _analyze_bytes(data)
+    _cache[digest] = result
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
+
+
+def _analysis_done(digest: str, task: asyncio.Future):
+    _inflight.pop(digest, None)
+    # Marks the exception as retrieved when every caller was cancelled
+    if not task.cancelled():
+        task.exception()
+
+
+async def _download(image_url: str) -> bytes:
+    """Stream an image, failing before reading the body if it is not an image or too large."""
+    async with get_http_client().stream("GET", image_url) as resp:
+        resp.raise_for_status()
+        content_type = resp.headers.get("Content-Type", "").lower()
+        if content_type and not content_type.startswith(IMAGE_CONTENT_TYPES):
+            raise ValueError(f"Not an image: {content_type}")
+        if int(resp.headers.get("Content-Length") or 0) > MAX_IMAGE_BYTES:
+            raise ValueError(f"Image larger than {MAX_IMAGE_BYTES // 2 ** 20} MB")
+
+        chunks, size = [], 0
+        async for chunk in resp.aiter_bytes():
+            size += len(chunk)
+            if size > MAX_IMAGE_BYTES:
+                raise ValueError(f"Image larger than {MAX_IMAGE_BYTES // 2 ** 20} MB")
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def _analyze_url(image_url: str) -> dict:
+    data = await _download(image_url)
+    digest = hashlib.sha256(data).hexdigest()
+
+    if digest in _cache:
+        _cache.move_to_end(digest)
+        return _cache[digest]
+
+    # Identical images requested concurrently share a single analysis
+    task = _inflight.get(digest)
+    if task is None:
+        task = asyncio.ensure_future(_analyze_and_cache(digest, data))
+        _inflight[digest] = task
+        task.add_done_callback(lambda t: _analysis_done(digest, t))
+    # Shielded so a cancelled caller does not cancel the analysis the others wait on
+    return await asyncio.shield(task)
+
+
+async def get_image_analysis(image_url: str) -> dict:
+    """
+    Get the analysis (caption and OCR lines) of an image.
+
+    Args:
+        image_url: The URL of the image to analyze.
+
+    Returns:
+        dict with:
+          - "caption": generated caption (or None)
+          - "read": list of {line} found in the image
+    """
+    try:
+        return await _analyze_url(image_url)
+    except Exception as e:
+        logger.error(f"Failed to analyze image {image_url}: {e}")
+        return {"error": str(e)}
+
+
+async def get_images_analysis(image_urls: list[str], max_concurrency: int = 5) -> dict:
+    """
+    Analyze many images concurrently. Identical images (same content, any URL) are analyzed once.
+
+    Args:
+        image_urls:      List of image URLs to analyze
+        max_concurrency: Maximum number of analyses running at the same time
+
+    Returns:
+        dict with:
+          - "results": list of {url, caption, read} or {url, error}, in input order
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(url: str) -> dict:
+        async with semaphore:
+            return {"url": url, **await get_image_analysis(url)}
+
+    results = await asyncio.gather(*(run(url) for url in image_urls))
+    return {"results": list(results)}
@@ -1,5 +1,5 @@
+import functools
 import io
-import contextlib
 from typing import Dict, Any
 import traceback
 
@@ -113,79 +113,65 @@ def execute_python_code(
     # Create a restricted globals dictionary
     restricted_globals = get_safe_builtins()
     
-    # Create a string buffer to capture stdout and stderr
+    # Capture the snippet's output with its own print: redirecting sys.stdout
+    # would also capture (and break) other threads of the server
     stdout_buffer = io.StringIO()
-    stderr_buffer = io.StringIO()
-    
-    # Redirect stdout and stderr
-    with contextlib.redirect_stdout(stdout_buffer), \
-         contextlib.redirect_stderr(stderr_buffer):
+    restricted_globals['print'] = functools.partial(print, file=stdout_buffer)
+
+    try:
+        # Compile the code first to check for syntax errors
+        try:
+            compiled_code = compile(code, '<string>', 'exec')
+        except SyntaxError as e:
+            logger.error(f"Syntax error: {str(e)}")
+            return {
+                'success': False,
+                'error': f'Syntax error: {str(e)}',
+                'output': '',
+                'traceback': str(e)
+            }
         
+        # Execute the code with a timeout
         try:
-            # Compile the code first to check for syntax errors
-            try:
-                compiled_code = compile(code, '<string>', 'exec')
-            except SyntaxError as e:
-                logger.error(f"Syntax error: {str(e)}")
-                return {
-                    'success': False,
-                    'error': f'Syntax error: {str(e)}',
-                    'output': '',
-                    'traceback': str(e)
-                }
+            # Create a local namespace for the code execution
+            local_vars = {}
+            
+            # Execute the code
+            exec(compiled_code, restricted_globals, local_vars)
+            
+            # Get the result (if any)
+            result = local_vars.get('result', None)
+            
+            # Get the output
+            output = stdout_buffer.getvalue()
             
-            # Execute the code with a timeout
-            try:
-                # Create a local namespace for the code execution
-                local_vars = {}
-                
-                # Execute the code
-                exec(compiled_code, restricted_globals, local_vars)
-                
-                # Get the result (if any)
-                result = local_vars.get('result', None)
-                
-                # Get the output
-                output = stdout_buffer.getvalue()
-                
-                # Truncate output if too long
-                if len(output) > max_output_length:
-                    output = output[:max_output_length] + '\n... (output truncated)'
-                
-                # Check for errors in stderr
-                error_output = stderr_buffer.getvalue()
-                if error_output:
-                    logger.error(f"Error during execution: {error_output}")
-                    return {
-                        'success': False,
-                        'error': 'Error during execution',
-                        'output': output,
-                        'stderr': error_output[:max_output_length]
-                    }
-                
-                return {
-                    'success': True,
-                    'result': str(result) if result is not None else None,
-                    'output': output,
-                    'type': type(result).__name__ if result is not None else None
-                }
-                
-            except Exception as e:
-                tb = traceback.format_exc()
-                logger.error(f"Execution error: {str(e)}")
-                return {
-                    'success': False,
-                    'error': f'Execution error: {str(e)}',
-                    'output': stdout_buffer.getvalue(),
-                    'traceback': tb
-                }
-                
+            # Truncate output if too long
+            if len(output) > max_output_length:
+                output = output[:max_output_length] + '\n... (output truncated)'
+
+            return {
+                'success': True,
+                'result': str(result) if result is not None else None,
+                'output': output,
+                'type': type(result).__name__ if result is not None else None
+            }
+
         except Exception as e:
             tb = traceback.format_exc()
-            logger.error(f"Unexpected error: {str(e)}")
+            logger.error(f"Execution error: {str(e)}")
             return {
                 'success': False,
-                'error': f'Unexpected error: {str(e)}',
+                'error': f'Execution error: {str(e)}',
                 'output': stdout_buffer.getvalue(),
                 'traceback': tb
             }
+            
+    except Exception as e:
+        tb = traceback.format_exc()
+        logger.error(f"Unexpected error: {str(e)}")
+        return {
+            'success': False,
+            'error': f'Unexpected error: {str(e)}',
+            'output': stdout_buffer.getvalue(),
+            'traceback': tb
+        }
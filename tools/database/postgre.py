@@ -1,11 +1,12 @@
 from psycopg import connect as pg_connect
 from psycopg.sql import SQL
 
+from core.budget import resolve_budget, truncate_rows
 from core.config import settings
 from core.logger import logger
 
 def connect():
-    """Create a connection to the PostgreSQL database."""
+    """Create a connection to the PostgreSQL database, the caller closes it."""
     try:
         conn = pg_connect(
             host=settings.POSTGRES_HOST,
@@ -19,16 +20,14 @@ def connect():
     except Exception as e:
         logger.error(f"Failed to connect to PostgreSQL: {e}")
         return None
-    finally:
-        if conn is not None:
-            conn.close()
 
-def read_db(query):
+def read_db(query, max_tokens: int = None):
     """
     Read a database from a PostgreSQL server.
 
     Args:
         query (str): The query to execute.
+        max_tokens (int): Token budget for the rows (default: OUTPUT_MAX_TOKENS, 0 for unlimited).
 
     Returns:
         list: A list of rows from the database.
@@ -39,7 +38,9 @@ def read_db(query):
     try:
         with conn.cursor() as cur:
             cur.execute(SQL(query))
-            return cur.fetchall()
+            return truncate_rows(cur.fetchall(), resolve_budget(max_tokens))
     except Exception as e:
         logger.error(f"Failed to execute query: {e}")
-        return None
\ No newline at end of file
+        return None
+    finally:
+        conn.close()
@@ -1,15 +1,46 @@
 import base64
+import time
 import requests
+from core.budget import resolve_budget, truncate_patches, truncate_rows, truncate_text
 from core.config import settings
 from core.logger import logger
+from core.store import get_store
 
 HEADERS = {
     "Authorization": f"token {settings.GITHUB_TOKEN}",
     "Accept": "application/vnd.github.v3+json",
 }
 
+session = requests.Session()
+session.headers.update(HEADERS)
 
-def get_github_file_content(owner: str, repo: str, path: str = "") -> dict:
+
+class RateLimitExhausted(Exception):
+    """The GitHub rate limit shared by all workers is spent until its reset time"""
+    pass
+
+
+def github_get(url: str, params: dict = None) -> requests.Response:
+    """
+    GET on the GitHub API through a pooled session.
+
+    The remaining rate-limit budget is kept in the shared store, so once it is
+    spent every worker stops calling GitHub until the reset time.
+    """
+    key = "github_rate_limit:" + ("search" if "/search/" in url else "core")
+    budget = get_store().get(key)
+    if budget is not None and budget["remaining"] <= 0 and budget["reset"] > time.time():
+        raise RateLimitExhausted(f"GitHub API rate limit exceeded until {time.strftime('%H:%M:%S UTC', time.gmtime(budget['reset']))}")
+
+    resp = session.get(url, params=params)
+    remaining = resp.headers.get("X-RateLimit-Remaining")
+    reset = resp.headers.get("X-RateLimit-Reset")
+    if remaining is not None and reset is not None:
+        get_store().set(key, {"remaining": int(remaining), "reset": int(reset)}, max(1, int(reset) - time.time()))
+    return resp
+
+
+def get_github_file_content(owner: str, repo: str, path: str = "", max_tokens: int = None) -> dict:
     """
     Fetch a file’s content or folder from a GitHub repository.
 
@@ -17,6 +48,7 @@ def get_github_file_content(owner: str, repo: str, path: str = "") -> dict:
         owner:   GitHub username or organization
         repo:    Repository name
         path:    Path to the file within the repo (e.g., "src/app.py" or "/" for root)
+        max_tokens: Token budget for the content (default: OUTPUT_MAX_TOKENS, 0 for unlimited)
 
     Returns:
         A dict with:
@@ -26,8 +58,12 @@ def get_github_file_content(owner: str, repo: str, path: str = "") -> dict:
     """
     if path == "/":
         path = ""
-    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
-    resp = requests.get(url, headers=HEADERS)
+    url = f"{settings.GITHUB_API_URL}/repos/{owner}/{repo}/contents/{path}"
+    try:
+        resp = github_get(url)
+    except RateLimitExhausted as e:
+        logger.error(str(e))
+        return {"type": "error", "message": str(e)}
     try:
         data = resp.json()
     except ValueError:
@@ -42,14 +78,14 @@ def get_github_file_content(owner: str, repo: str, path: str = "") -> dict:
     if isinstance(data, list):
         return {
             "type": "dir",
-            "entries": [
+            "entries": truncate_rows([
                 {
                     "name": entry.get("name"),
                     "path": entry.get("path"),
                     "type": entry.get("type")
                 }
                 for entry in data
-            ]
+            ], resolve_budget(max_tokens))
         }
 
     # Handle single file
@@ -61,7 +97,7 @@ def get_github_file_content(owner: str, repo: str, path: str = "") -> dict:
     return {
         "type": "file",
         "path": data.get("path"),
-        "content": decoded,
+        "content": truncate_text(decoded, resolve_budget(max_tokens)),
     }
 
 def get_workflow_runs(owner: str, repo: str, last_req: int = 5) -> dict:
@@ -78,12 +114,15 @@ def get_workflow_runs(owner: str, repo: str, last_req: int = 5) -> dict:
           - "total": number of runs returned
           - "runs": list of dicts with run info
     """
-    url = f"https://api.github.com/repos/{owner}/{repo}/actions/runs"
+    url = f"{settings.GITHUB_API_URL}/repos/{owner}/{repo}/actions/runs"
     params = {"per_page": min(last_req, 100)}
 
     try:
-        resp = requests.get(url, headers=HEADERS, params=params)
+        resp = github_get(url, params)
         data = resp.json()
+    except RateLimitExhausted as e:
+        logger.error(str(e))
+        return {"error": str(e)}
     except Exception:
         logger.error("Failed to fetch or parse response from GitHub")
         return {"error": "Failed to fetch or parse response from GitHub"}
@@ -125,15 +164,18 @@ def search_codebase(owner: str, repo: str, keyword: str, limit: int = 10) -> dic
           - "total": total matches from GitHub
           - "results": list of matches with file path and URL
     """
-    url = "https://api.github.com/search/code"
+    url = f"{settings.GITHUB_API_URL}/search/code"
     params = {
         "q": f"{keyword} repo:{owner}/{repo}",
         "per_page": min(limit, 100)
     }
 
     try:
-        resp = requests.get(url, headers=HEADERS, params=params)
+        resp = github_get(url, params)
         data = resp.json()
+    except RateLimitExhausted as e:
+        logger.error(str(e))
+        return {"error": str(e)}
     except Exception:
         logger.error("Failed to query GitHub Code Search API")
         return {"error": "Failed to query GitHub Code Search API"}
@@ -156,7 +198,7 @@ def search_codebase(owner: str, repo: str, keyword: str, limit: int = 10) -> dic
         "results": results
     }
 
-def get_file_structure(owner: str, repo: str, branch: str = "main") -> dict:
+def get_file_structure(owner: str, repo: str, branch: str = "main", max_tokens: int = None) -> dict:
     """
     Get full file structure of a GitHub repo using the Git Trees API.
 
@@ -164,16 +206,20 @@ def get_file_structure(owner: str, repo: str, branch: str = "main") -> dict:
         owner:  GitHub user/org
         repo:   Repository name
         branch: Branch to inspect (default: "main")
+        max_tokens: Token budget for the tree (default: OUTPUT_MAX_TOKENS, 0 for unlimited)
 
     Returns:
         dict with:
           - "tree": list of {path, type}
     """
-    url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
+    url = f"{settings.GITHUB_API_URL}/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
 
     try:
-        resp = requests.get(url, headers=HEADERS)
+        resp = github_get(url)
         data = resp.json()
+    except RateLimitExhausted as e:
+        logger.error(str(e))
+        return {"error": str(e)}
     except Exception:
         logger.error("Failed to fetch or parse Git tree")
         return {"error": "Failed to fetch or parse Git tree"}
@@ -185,10 +231,10 @@ def get_file_structure(owner: str, repo: str, branch: str = "main") -> dict:
 
     tree = data.get("tree", [])
     return {
-        "tree": [
+        "tree": truncate_rows([
             {"path": item["path"], "type": item["type"]}
             for item in tree if item["type"] in ("blob", "tree")
-        ]
+        ], resolve_budget(max_tokens))
     }
 
 def get_commit_history(owner: str, repo: str, path: str = None, limit: int = 10) -> dict:
@@ -205,14 +251,17 @@ def get_commit_history(owner: str, repo: str, path: str = None, limit: int = 10)
         dict with:
           - "commits": list of {sha, author, date, message}
     """
-    url = f"https://api.github.com/repos/{owner}/{repo}/commits"
+    url = f"{settings.GITHUB_API_URL}/repos/{owner}/{repo}/commits"
     params = {"per_page": limit}
     if path:
         params["path"] = path
 
     try:
-        resp = requests.get(url, headers=HEADERS, params=params)
+        resp = github_get(url, params)
         data = resp.json()
+    except RateLimitExhausted as e:
+        logger.error(str(e))
+        return {"error": str(e)}
     except Exception:
         logger.error("Failed to fetch or parse commit history")
         return {"error": "Failed to fetch or parse commit history"}
@@ -233,7 +282,7 @@ def get_commit_history(owner: str, repo: str, path: str = None, limit: int = 10)
         ]
     }
 
-def get_commit_diff(owner: str, repo: str, sha: str) -> dict:
+def get_commit_diff(owner: str, repo: str, sha: str, max_tokens: int = None) -> dict:
     """
     Fetch file-level diffs for a specific commit.
 
@@ -241,16 +290,20 @@ def get_commit_diff(owner: str, repo: str, sha: str) -> dict:
         owner: GitHub user/org
         repo:  Repository name
         sha:   Commit SHA to inspect
+        max_tokens: Token budget for the patches (default: OUTPUT_MAX_TOKENS, 0 for unlimited)
 
     Returns:
         dict with:
           - "files": list of {filename, status, patch}
     """
-    url = f"https://api.github.com/repos/{owner}/{repo}/commits/{sha}"
+    url = f"{settings.GITHUB_API_URL}/repos/{owner}/{repo}/commits/{sha}"
 
     try:
-        resp = requests.get(url, headers=HEADERS)
+        resp = github_get(url)
         data = resp.json()
+    except RateLimitExhausted as e:
+        logger.error(str(e))
+        return {"error": str(e)}
     except Exception:
         logger.error("Failed to fetch or parse commit details")
         return {"error": "Failed to fetch or parse commit details"}
@@ -261,12 +314,14 @@ def get_commit_diff(owner: str, repo: str, sha: str) -> dict:
         return {"error": msg}
 
     files = data.get("files", [])
+    # Files share the budget, unused budget rolls over to the larger patches; hunk headers are always kept
+    patches = truncate_patches([f.get("patch") for f in files], resolve_budget(max_tokens))
     results = []
-    for f in files:
+    for f, patch in zip(files, patches):
         results.append({
             "filename": f.get("filename"),
             "status": f.get("status"),  # added, modified, removed
-            "patch": f.get("patch")     # unified diff (can be None)
+            "patch": patch     # unified diff (can be None)
         })
 
     return {"files": results}
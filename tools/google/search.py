@@ -1,7 +1,25 @@
+import asyncio
+
 from googlesearch import search
 
+from core.cache import TTLCache
+
+# Search results are reused for an hour
+_cache = TTLCache("search_google", ttl=3600)
+
+
+def _search(query: str, num_results: int) -> list:
+    return [
+        {
+            "url": result.url,
+            "title": result.title,
+            "description": result.description,
+        }
+        for result in search(query, advanced=True, num_results=num_results)
+    ]
+
 
-def search_google(query: str, num_results: int = 10):
+async def search_google(query: str, num_results: int = 10):
     """
     Search Google for a query.
 
@@ -10,7 +28,9 @@ def search_google(query: str, num_results: int = 10):
         num_results: The number of results to return.
 
     Returns:
-        A list of search results.
+        A list of search results ({url, title, description}).
     """
-    results = list(search(query, advanced=True, num_results=num_results))
-    return results
+    return await _cache.get_or_fetch(
+        f"{num_results}:{query}",
+        lambda: asyncio.to_thread(_search, query, num_results),
+    )
@@ -1,34 +1,81 @@
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_search import YoutubeSearch
-import json
+import asyncio
+from typing import Optional
+
+from core.budget import resolve_budget, truncate_text
+from core.cache import TTLCache
+from core.logger import logger
+
+# Transcript languages, by priority
+LANGUAGES = ["en", "fr"]
 
 ytt_api = YouTubeTranscriptApi()
 
-def get_youtube_transcript(video_id: str):
+# Transcripts never change, search results are reused for an hour
+_transcripts = TTLCache("youtube_transcript", ttl=30 * 24 * 3600)
+_searches = TTLCache("search_youtube", ttl=3600)
+
+
+def _fetch_transcript(video_id: str) -> str:
+    # A single listing serves every language, the first available one in LANGUAGES wins
+    script = ytt_api.fetch(video_id, languages=LANGUAGES)
+    return " ".join([line.text for line in script])
+
+
+async def get_youtube_transcript(video_id: str, max_tokens: Optional[int] = None):
     """
     Get the transcript of a YouTube video.
 
     Args:
         video_id: The ID of the video to get the transcript for.
+        max_tokens: Token budget for the transcript (default: OUTPUT_MAX_TOKENS, 0 for unlimited).
 
     Returns:
         The transcript of the video, or None if no transcript is found.
     """
-    try :
-        script = ytt_api.fetch(video_id)
+    try:
+        script = await _transcripts.get_or_fetch(video_id, lambda: asyncio.to_thread(_fetch_transcript, video_id))
     except Exception as e:
-        try: 
-            script = ytt_api.fetch(video_id, languages=['fr'])
-        except Exception as e:
-            print("No transcript found, error: ", e)
-            return None
+        logger.error(f"No transcript found for {video_id}, error: {e}")
+        return None
+
+    return truncate_text(script, resolve_budget(max_tokens))
+
+
+async def get_youtube_transcripts(video_ids: list[str], max_concurrency: int = 5, max_tokens: Optional[int] = None) -> dict:
+    """
+    Get the transcripts of many YouTube videos concurrently.
 
-    if script:
-        script = " ".join([line.text for line in script])
+    Args:
+        video_ids: The IDs of the videos to get the transcripts for.
+        max_concurrency: Maximum number of transcripts fetched at the same time.
+        max_tokens: Token budget shared by all transcripts (default: OUTPUT_MAX_TOKENS, 0 for unlimited).
+
+    Returns:
+        dict with:
+          - "transcripts": {video_id: transcript or None}
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    budget = resolve_budget(max_tokens)
+    share = max(1, budget // len(video_ids)) if budget and video_ids else 0
+
+    async def run(video_id: str):
+        async with semaphore:
+            return await get_youtube_transcript(video_id, share)
 
-    return script
+    transcripts = await asyncio.gather(*(run(video_id) for video_id in video_ids))
+    return {"transcripts": dict(zip(video_ids, transcripts))}
 
-def search_youtube(query: str):
+
+def _search(query: str) -> dict:
+    videos = YoutubeSearch(query, max_results=10).to_dict()
+    for video in videos:
+        video.pop("thumbnails", None)
+    return {"videos": videos}
+
+
+async def search_youtube(query: str):
     """
     Search YouTube for a query.
 
@@ -38,12 +85,4 @@ def search_youtube(query: str):
     Returns:
         A list of search results.
     """
-    results = YoutubeSearch(query, max_results=10).to_json()
-    results_dict = json.loads(results)
-
-    for video in results_dict['videos']:
-        if "thumbnails" in video:
-            del video["thumbnails"]
-    
-    return results_dict
-
+    return await _searches.get_or_fetch(query, lambda: asyncio.to_thread(_search, query))
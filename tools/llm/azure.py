@@ -1,37 +1,131 @@
+import asyncio
+import hashlib
+import json
+import random
+from typing import Optional
+
+from core.cache import TTLCache
 from core.logger import logger
 from core.config import settings
 
-from openai import AzureOpenAI
-
-client = AzureOpenAI(
-    api_version=settings.AZURE_OPENAI_API_VERSION,
-    azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
-    api_key=settings.AZURE_OPENAI_KEY
-)
+from mcp.server.fastmcp import Context
+from openai import AsyncAzureOpenAI, RateLimitError
 
 model = "gpt-4o-mini"
 
-def get_azure_openai_response(message):
+# Retries on HTTP 429 before giving up
+MAX_RETRIES = 5
+# Number of deterministic (temperature 0) responses kept in memory, and for how long
+CACHE_SIZE = 256
+CACHE_TTL = 24 * 3600
+
+_client = None
+# Process local: prompts are not written to the shared store
+_cache = TTLCache("azure_openai", ttl=CACHE_TTL, maxsize=CACHE_SIZE, shared=False)
+
+
+def get_client() -> AsyncAzureOpenAI:
+    """Create the async client on first use; it is reused so connections stay pooled."""
+    global _client
+    if _client is None:
+        _client = AsyncAzureOpenAI(
+            api_version=settings.AZURE_OPENAI_API_VERSION,
+            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+            api_key=settings.AZURE_OPENAI_KEY,
+            max_retries=0,  # 429 retries are handled below
+        )
+    return _client
+
+
+def _cache_key(message: str, max_tokens: int) -> str:
+    raw = json.dumps([model, message, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _retry_delay(error: RateLimitError, attempt: int) -> float:
+    retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return min(2 ** attempt, 30) + random.random()
+
+
+async def _complete(message: str, max_tokens: int, temperature: float, ctx: Optional[Context] = None) -> str:
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            stream = await get_client().chat.completions.create(
+                model=model,
+                messages=[{
+                    "role": "user",
+                    "content": message,
+                }],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+            )
+            parts = []
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                delta = chunk.choices[0].delta.content
+                parts.append(delta)
+                if ctx is not None:
+                    try:
+                        await ctx.report_progress(len(parts), None, message=delta)
+                    except Exception as e:
+                        # The client went away: the completion may be shared by other callers, keep going
+                        logger.warning(f"Stopping Azure OpenAI progress notifications: {e}")
+                        ctx = None
+            return "".join(parts)
+        except RateLimitError as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = _retry_delay(e, attempt)
+            logger.warning(f"Azure OpenAI rate limited, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+async def get_azure_openai_response(message: str, max_tokens: int = 4096, temperature: float = 0.7, ctx: Context = None):
     """
-    Get a response from Azure OpenAI.
+    Get a response from Azure OpenAI. Tokens are streamed back as MCP progress notifications.
 
     Args:
-        message: message to send to the model.
+        message:     message to send to the model.
+        max_tokens:  maximum number of tokens to generate.
+        temperature: sampling temperature, responses at 0 are cached.
 
     Returns:
         The response from the model.
     """
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{
-                "role": "user",
-                "content": message,
-            }],
-            max_tokens=10000,
-            temperature=0.7,
-        )
-        return response.choices[0].message.content
+        if temperature == 0:
+            # Identical prompts in flight share one completion (progress goes to the first caller)
+            return await _cache.get_or_fetch(_cache_key(message, max_tokens), lambda: _complete(message, max_tokens, temperature, ctx))
+        return await _complete(message, max_tokens, temperature, ctx)
     except Exception as e:
         logger.error(f"Failed to get Azure OpenAI response: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+async def get_azure_openai_responses(messages: list[str], max_tokens: int = 4096, temperature: float = 0.7, max_concurrency: int = 5) -> dict:
+    """
+    Send many prompts to Azure OpenAI concurrently.
+
+    Args:
+        messages:        list of messages to send, one completion each.
+        max_tokens:      maximum number of tokens to generate per message.
+        temperature:     sampling temperature, responses at 0 are cached.
+        max_concurrency: maximum number of requests in flight.
+
+    Returns:
+        dict with:
+          - "responses": list of responses (None on failure), in input order
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(message: str):
+        async with semaphore:
+            return await get_azure_openai_response(message, max_tokens, temperature)
+
+    responses = await asyncio.gather(*(run(m) for m in messages))
+    return {"responses": list(responses)}
@@ -0,0 +1,243 @@
+"""
+Declarative tool registry.
+
+Each tool is declared by name, description, parameters and import path. The
+module implementing it is only imported the first time the tool is called,
+which keeps heavy SDKs (Azure, OpenAI, psycopg...) out of server startup.
+
+Idempotent tools declare a CachePolicy: their results are memoized and
+identical concurrent calls share one upstream call (see core/memo.py).
+"""
+import asyncio
+import importlib
+import inspect
+from dataclasses import dataclass
+from typing import Annotated, Any, Optional
+
+from mcp.server.fastmcp import Context, FastMCP
+from pydantic import Field
+
+from core.config import settings
+from core.logger import logger
+from core.memo import CachePolicy, memoize
+from tools.code.tools import ALLOWED_MODULES  # Standard library only, cheap to import
+
+REQUIRED = inspect.Parameter.empty
+
+
+@dataclass(frozen=True)
+class Param:
+    name: str
+    type: Any
+    description: str
+    default: Any = REQUIRED
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    name: str
+    target: str  # "package.module:function"
+    description: str
+    params: tuple = ()
+    requires: tuple = ()  # Settings fields that must be set
+    context: bool = False  # Pass the MCP Context as ctx
+    cache: Optional[CachePolicy] = None  # Memoize results of idempotent tools
+
+
+def _budget(what: str = "output") -> Param:
+    return Param("max_tokens", Optional[int], f"Token budget for the {what} (default: OUTPUT_MAX_TOKENS, 0 for unlimited)", None)
+
+
+OWNER = Param("owner", str, "GitHub user/org")
+REPO = Param("repo", str, "Repository name")
+GITHUB = ("GITHUB_TOKEN",)
+AZURE = ("AZURE_CLIENT_ID", "AZURE_CLIENT_SECRET", "AZURE_TENANT_ID")
+VISION = ("VISION_ENDPOINT", "VISION_KEY")
+POSTGRES = ("POSTGRES_HOST", "POSTGRES_DB", "POSTGRES_USER", "POSTGRES_PASSWORD")
+OPENAI = ("AZURE_OPENAI_ENDPOINT", "AZURE_OPENAI_KEY")
+ADMIN = ("ENABLE_ADMIN_TOOLS",)
+
+TOOLS = [
+    # GitHub
+    ToolSpec("get_github_file_folder", "tools.github.tools:get_github_file_content",
+             "Get a file or folder from GitHub, / for root",
+             (OWNER, REPO, Param("path", str, "File path (\"\" or / for root)", ""), _budget("content")),
+             requires=GITHUB, cache=CachePolicy(ttl=60, stale_while_revalidate=300)),
+    ToolSpec("get_workflow_runs", "tools.github.tools:get_workflow_runs",
+             "Get the latest N workflow runs from a GitHub repo",
+             (OWNER, REPO, Param("last_req", int, "Number of most recent workflow runs to fetch (max 100)", 5)),
+             requires=GITHUB, cache=CachePolicy(ttl=15)),
+    ToolSpec("search_codebase", "tools.github.tools:search_codebase",
+             "Search for a keyword in a GitHub repository using the Code Search API",
+             (OWNER, REPO, Param("keyword", str, "Keyword to search for"), Param("limit", int, "Max number of results to return", 10)),
+             requires=GITHUB, cache=CachePolicy(ttl=300)),
+    ToolSpec("get_file_structure", "tools.github.tools:get_file_structure",
+             "Get the full file structure of a GitHub repo",
+             (OWNER, REPO, Param("branch", str, "Branch to inspect", "main"), _budget("tree")),
+             requires=GITHUB, cache=CachePolicy(ttl=300, stale_while_revalidate=3600)),
+    ToolSpec("get_commit_history", "tools.github.tools:get_commit_history",
+             "Get recent commit history (optionally for a specific file)",
+             (OWNER, REPO, Param("path", Optional[str], "File path to scope commits (\"\" for root)", None),
+              Param("limit", int, "Max number of commits to return", 10)),
+             requires=GITHUB, cache=CachePolicy(ttl=60, stale_while_revalidate=300)),
+    ToolSpec("get_commit_diff", "tools.github.tools:get_commit_diff",
+             "Fetch file-level diffs for a specific commit",
+             (OWNER, REPO, Param("sha", str, "Commit SHA to inspect"), _budget("patches")),
+             requires=GITHUB, cache=CachePolicy(ttl=24 * 3600)),  # Commits never change
+
+    # Utils
+    ToolSpec("get_current_utc_timestamp", "tools.utils.tools:get_current_utc_timestamp",
+             "Get the current UTC time in the format: YYYY-MM-DDTHH:MM:SS.ffffff0Z"),
+    ToolSpec("get_website_content", "tools.utils.tools:get_website_content",
+             "Get the content of a website in Markdown format",
+             (Param("url", str, "The URL of the website to get the content for"), _budget())),  # Cached by tools/utils/web.py following Cache-Control
+    ToolSpec("crawl_websites", "tools.utils.crawler:crawl_websites",
+             "Fetch many websites (or the top Google results for a query) concurrently in Markdown format",
+             (Param("urls", Optional[list[str]], "List of URLs to fetch", None),
+              Param("query", Optional[str], "Google query whose top results are fetched", None),
+              Param("top_k", int, "Number of search results to fetch when a query is given", 5),
+              Param("max_concurrency", int, "Maximum number of pages fetched at the same time", 8),
+              Param("per_host", int, "Maximum number of pages fetched at the same time from one host", 2),
+              _budget("pages, shared")),
+             context=True),
+
+    # Azure
+    ToolSpec("run_log_analytics_query", "tools.azure.tools:run_log_analytics_query",
+             "Run a Log Analytics query against a given workspace using API",
+             (Param("workspace", str, "Log Analytics workspace ID"),
+              Param("query", str, "KQL query string (data queries only)"), _budget("rows")),
+             requires=AZURE),
+
+    # Google
+    ToolSpec("search_google", "tools.google.search:search_google",
+             "Search Google for a query",
+             (Param("query", str, "The query to search for"), Param("num_results", int, "The number of results to return", 10))),
+    ToolSpec("search_youtube", "tools.google.youtube:search_youtube",
+             "Search YouTube for a query",
+             (Param("query", str, "The query to search for"),)),
+    ToolSpec("get_youtube_transcript", "tools.google.youtube:get_youtube_transcript",
+             "Get the transcript of a YouTube video",
+             (Param("video_id", str, "The ID of the video to get the transcript for"), _budget("transcript"))),
+    ToolSpec("get_youtube_transcripts", "tools.google.youtube:get_youtube_transcripts",
+             "Get the transcripts of many YouTube videos concurrently",
+             (Param("video_ids", list[str], "The IDs of the videos to get the transcripts for"),
+              Param("max_concurrency", int, "Maximum number of transcripts fetched at the same time", 5),
+              _budget("transcripts, shared"))),
+
+    # Azure vision
+    ToolSpec("get_image_analysis", "tools.azure.vision:get_image_analysis",
+             "Get the analysis of an image",
+             (Param("image_url", str, "The URL of the image to analyze"),),
+             requires=VISION),
+    ToolSpec("get_images_analysis", "tools.azure.vision:get_images_analysis",
+             "Analyze many images concurrently, identical images are analyzed once",
+             (Param("image_urls", list[str], "List of image URLs to analyze"),
+              Param("max_concurrency", int, "Maximum number of analyses running at the same time", 5)),
+             requires=VISION),
+
+    # Database
+    ToolSpec("read_db", "tools.database.postgre:read_db",
+             "Read a database from a PostgreSQL server",
+             (Param("query", str, "The query to execute"), _budget("rows")),
+             requires=POSTGRES),
+
+    # LLM
+    ToolSpec("get_azure_openai_response", "tools.llm.azure:get_azure_openai_response",
+             "Request an other LLM",
+             (Param("message", str, "The message to send to the model"),
+              Param("max_tokens", int, "Maximum number of tokens to generate", 4096),
+              Param("temperature", float, "Sampling temperature, responses at 0 are cached", 0.7)),
+             requires=OPENAI, context=True),
+    ToolSpec("get_azure_openai_responses", "tools.llm.azure:get_azure_openai_responses",
+             "Send many prompts to an other LLM concurrently",
+             (Param("messages", list[str], "List of messages to send to the model"),
+              Param("max_tokens", int, "Maximum number of tokens to generate per message", 4096),
+              Param("temperature", float, "Sampling temperature, responses at 0 are cached", 0.7),
+              Param("max_concurrency", int, "Maximum number of requests in flight", 5)),
+             requires=OPENAI),
+
+    # Code execution
+    ToolSpec("execute_python_code", "tools.code.tools:execute_python_code",
+             "Execute Python code in a restricted environment, import available: " + ", ".join(ALLOWED_MODULES),
+             (Param("code", str, "Python code to execute"),
+              Param("max_output_length", int, "Maximum length of the output", 1000))),
+
+    # Admin (search_google, search_youtube and the transcript tools keep their own caches, listed here too)
+    ToolSpec("inspect_cache", "tools.admin.tools:inspect_cache",
+             "Show hit-rate statistics of the caches, and their entries when a cache is given",
+             (Param("cache", Optional[str], "Cache name (e.g. tool:get_file_structure), all caches if empty", None),),
+             requires=ADMIN),
+    ToolSpec("purge_cache", "tools.admin.tools:purge_cache",
+             "Remove one entry, or every entry, of a cache",
+             (Param("cache", str, "Cache name (e.g. tool:get_file_structure)"),
+              Param("key", Optional[str], "Entry key as shown by inspect_cache, all entries if empty", None)),
+             requires=ADMIN),
+]
+
+
+def missing_settings(spec: ToolSpec) -> list:
+    return [name for name in spec.requires if not getattr(settings, name, "")]
+
+
+def load_target(spec: ToolSpec):
+    """Import the module implementing a tool and return its function."""
+    module_name, _, attr = spec.target.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def lazy_tool(spec: ToolSpec):
+    """
+    Build a function with the tool's signature that imports the implementation on first call.
+
+    FastMCP derives the input schema from the signature, so the real module is
+    not needed to register the tool.
+    """
+    target = None
+    loading = asyncio.Lock()
+
+    async def invoke(**kwargs):
+        nonlocal target
+        if target is None:
+            async with loading:
+                if target is None:
+                    # Importing an SDK takes long enough to stall every session
+                    target = await asyncio.to_thread(load_target, spec)
+                    logger.debug(f"Loaded tool {spec.name} from {spec.target}")
+        if inspect.iscoroutinefunction(target):
+            return await target(**kwargs)
+        # Sync tools block on I/O or CPU, run them off the event loop
+        return await asyncio.to_thread(target, **kwargs)
+
+    call = memoize(invoke, spec.cache, spec.name) if spec.cache is not None else invoke
+
+    async def tool(**kwargs):
+        return await call(**kwargs)
+
+    parameters = [
+        inspect.Parameter(
+            p.name,
+            inspect.Parameter.KEYWORD_ONLY,
+            annotation=Annotated[p.type, Field(description=p.description)],
+            default=p.default,
+        )
+        for p in spec.params
+    ]
+    if spec.context:
+        parameters.append(inspect.Parameter("ctx", inspect.Parameter.KEYWORD_ONLY, annotation=Context, default=None))
+
+    tool.__name__ = spec.name
+    tool.__doc__ = spec.description
+    tool.__signature__ = inspect.Signature(parameters)
+    tool.__annotations__ = {p.name: p.annotation for p in parameters}
+    return tool
+
+
+def register_tools(mcp: FastMCP, specs: list = TOOLS):
+    """Register every tool whose required settings are present."""
+    for spec in specs:
+        missing = missing_settings(spec)
+        if missing:
+            logger.warning(f"{', '.join(missing)} not found in .env, skipping {spec.name}")
+            continue
+        mcp.add_tool(lazy_tool(spec), name=spec.name, description=spec.description)
+
@@ -0,0 +1,173 @@
+import asyncio
+import re
+import time
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+from mcp.server.fastmcp import Context
+
+from core.budget import resolve_budget, truncate_text
+from core.logger import logger
+from tools.utils.tools import convert_html
+from tools.utils.web import USER_AGENT, decode_body, fetch, session, TIMEOUT
+
+# robots.txt files are refetched after this many seconds
+ROBOTS_TTL = 3600
+# Query parameters that never change the page content
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+CANONICAL_LINK = re.compile(r"""<link[^>]+rel=["']?canonical["']?[^>]*>""", re.IGNORECASE)
+HREF = re.compile(r"""href=["']?([^"'\s>]+)""", re.IGNORECASE)
+
+_robots: dict = {}
+_robots_locks: dict = {}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so that trivially different forms of the same page compare equal.
+
+    Lowercases scheme and host, drops default ports, fragments and tracking
+    parameters, sorts the query string and removes a trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "http"
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def _load_robots(origin: str) -> RobotFileParser:
+    parser = RobotFileParser()
+    try:
+        resp = session.get(f"{origin}/robots.txt", timeout=TIMEOUT)
+        if resp.status_code in (401, 403):
+            parser.disallow_all = True
+        elif resp.status_code == 200:
+            parser.parse(resp.text.splitlines())
+        else:
+            parser.allow_all = True
+    except Exception as e:
+        logger.warning(f"Unable to fetch robots.txt for {origin}: {e}")
+        parser.allow_all = True
+    return parser
+
+
+async def is_allowed(url: str) -> bool:
+    """Check robots.txt for url, each origin's file is fetched once per ROBOTS_TTL."""
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    lock = _robots_locks.setdefault(origin, asyncio.Lock())
+    async with lock:
+        cached = _robots.get(origin)
+        if cached is None or cached[0] < time.monotonic():
+            parser = await asyncio.to_thread(_load_robots, origin)
+            cached = (time.monotonic() + ROBOTS_TTL, parser)
+            _robots[origin] = cached
+    return cached[1].can_fetch(USER_AGENT, url)
+
+
+def _find_canonical(html: str, base_url: str) -> Optional[str]:
+    link = CANONICAL_LINK.search(html, 0, 65536)
+    if link is None:
+        return None
+    href = HREF.search(link.group(0))
+    return canonicalize_url(urljoin(base_url, href.group(1))) if href else None
+
+
+def _fetch_page(url: str, max_tokens: int) -> dict:
+    response = fetch(url)
+    text = decode_body(response.body, response.encoding)
+    canonical = None
+    if "html" in response.content_type or not response.content_type:
+        canonical = _find_canonical(text, response.url)
+        text = convert_html(text)
+    return {
+        "url": url,
+        "status": response.status,
+        "canonical": canonical,
+        "content": truncate_text(text, max_tokens),
+    }
+
+
+async def crawl_websites(
+    urls: Optional[list[str]] = None,
+    query: Optional[str] = None,
+    top_k: int = 5,
+    max_concurrency: int = 8,
+    per_host: int = 2,
+    max_tokens: Optional[int] = None,
+    ctx: Context = None,
+) -> dict:
+    """
+    Fetch many websites concurrently and convert them to Markdown.
+
+    Args:
+        urls:            URLs to fetch
+        query:           Google query whose top_k results are fetched (in addition to urls)
+        top_k:           Number of search results to fetch when query is given
+        max_concurrency: Maximum number of pages fetched at the same time
+        per_host:        Maximum number of pages fetched at the same time from one host
+        max_tokens:      Token budget shared by all pages (default: OUTPUT_MAX_TOKENS, 0 for unlimited)
+
+    Returns:
+        dict with:
+          - "results": list of {url, status, canonical, content} or {url, error}, in completion order
+          - "skipped": list of {url, reason} for duplicates and URLs disallowed by robots.txt
+    """
+    targets = list(urls or [])
+    if query:
+        from tools.google.search import search_google
+        found = await search_google(query, top_k)
+        targets.extend(result["url"] for result in found)
+
+    seen, pages, skipped = set(), [], []
+    for url in targets:
+        key = canonicalize_url(url)
+        if key in seen:
+            skipped.append({"url": url, "reason": "duplicate"})
+            continue
+        seen.add(key)
+        pages.append(url)
+
+    budget = resolve_budget(max_tokens)
+    share = max(1, budget // len(pages)) if budget and pages else 0
+    limit = asyncio.Semaphore(max(1, max_concurrency))
+    hosts: dict = {}
+
+    async def crawl(url: str) -> Optional[dict]:
+        host = urlsplit(url).netloc.lower()
+        async with hosts.setdefault(host, asyncio.Semaphore(max(1, per_host))), limit:
+            try:
+                if not await is_allowed(url):
+                    skipped.append({"url": url, "reason": "robots.txt"})
+                    return None
+                return await asyncio.to_thread(_fetch_page, url, share)
+            except Exception as e:
+                logger.error(f"Unable to crawl {url}: {e}")
+                return {"url": url, "error": str(e)}
+
+    results, canonicals = [], set()
+    tasks = [crawl(url) for url in pages]
+    for done, task in enumerate(asyncio.as_completed(tasks), start=1):
+        result = await task
+        if ctx is not None:
+            await ctx.report_progress(done, len(tasks), message=result["url"] if result else None)
+        if result is None:
+            continue
+        # Different URLs can declare the same canonical page
+        canonical = result.get("canonical") or canonicalize_url(result["url"])
+        if canonical in canonicals:
+            skipped.append({"url": result["url"], "reason": "duplicate"})
+            continue
+        canonicals.add(canonical)
+        results.append(result)
+
+    return {"results": results, "skipped": skipped}
@@ -1,8 +1,17 @@
 import datetime
-import requests
 from html_to_markdown import convert_to_markdown
+import lxml.html
+from lxml import etree
 import re
+from typing import Optional, Union
+from core.budget import resolve_budget, truncate_text
 from core.logger import logger
+from tools.utils.web import decode_body, fetch
+
+# Elements that never hold page content, removed before Markdown conversion
+BOILERPLATE_TAGS = ("script", "style", "noscript", "template", "iframe", "svg", "canvas", "nav", "footer", "aside", "form", "button")
+BOILERPLATE_XPATH = "//*[@role='navigation' or @role='banner' or @role='contentinfo' or @aria-hidden='true']"
+XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>")
 
 def get_current_utc_timestamp() -> str:
     """
@@ -16,22 +25,52 @@ def get_current_utc_timestamp() -> str:
            f"{now.hour:02d}:{now.minute:02d}:{now.second:02d}." \
            f"{fraction}Z"
 
-def get_website_content(url: str) -> str:
+def clean_html(html: str) -> str:
+    """
+    Strip boilerplate (scripts, navigation, footers...) and keep the main content when the page marks it.
+
+    Args:
+        html: Decoded HTML document.
+
+    Returns:
+        A smaller HTML document to convert.
+    """
+    try:
+        doc = lxml.html.document_fromstring(XML_DECLARATION.sub("", html, count=1))
+    except (etree.ParserError, ValueError):
+        return html
+
+    etree.strip_elements(doc, *BOILERPLATE_TAGS, with_tail=False)
+    for element in doc.xpath(BOILERPLATE_XPATH):
+        element.drop_tree()
+
+    main = doc.find(".//main")
+    if main is None:
+        main = doc.find(".//article")
+    return lxml.html.tostring(main if main is not None else doc, encoding="unicode")
+
+def convert_html(html: str) -> str:
+    """Convert an HTML document to compact Markdown."""
+    markdown_content = convert_to_markdown(clean_html(html), parser="lxml")
+    return re.sub(r'\n{2,}', '\n', markdown_content)
+
+def get_website_content(url: str, max_tokens: Optional[int] = None) -> Union[str, dict]:
     """
     Get the content of a website in Markdown format.
 
     Args:
         url: The URL of the website to get the content for.
+        max_tokens: Token budget for the output (default: OUTPUT_MAX_TOKENS, 0 for unlimited).
 
     Returns:
-        The content of the website cleaned in markdown.
+        The content of the website cleaned in markdown, or {"error": ...}.
     """
     try:
-        response = requests.get(url)
-        text = response.content.decode("utf-8")
-        markdown_content = convert_to_markdown(text)
-        markdown_content = re.sub(r'\n{2,}', '\n', markdown_content)
-        return markdown_content
+        response = fetch(url)
+        text = decode_body(response.body, response.encoding)
+        if "html" in response.content_type or not response.content_type:
+            text = convert_html(text)
+        return truncate_text(text, resolve_budget(max_tokens))
     except Exception as e:
-        logger.error("Unable to connect or parse response, error: ", e)
-        return "Unable to connect or parse response, error: " + str(e)
\ No newline at end of file
+        logger.error(f"Unable to connect or parse response, error: {e}")
+        return {"error": f"Unable to connect or parse response, error: {e}"}
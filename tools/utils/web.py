@@ -0,0 +1,186 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.logger import logger
+
+# Bodies larger than this are cut (pages rarely need more to be useful)
+MAX_BYTES = 5 * 1024 * 1024
+# (connect, read) timeouts in seconds
+TIMEOUT = (5, 20)
+CHUNK_SIZE = 64 * 1024
+# Number of responses kept in the HTTP cache
+CACHE_SIZE = 256
+
+USER_AGENT = "Mozilla/5.0 (compatible; MCP-github/1.0)"
+
+# Mess ratio above the best guess within which windows-1252 is still preferred
+CHAOS_TOLERANCE = 0.05
+
+META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_\-]+)""", re.IGNORECASE)
+
+session = requests.Session()
+session.headers["User-Agent"] = USER_AGENT
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+session.mount("http://", _adapter)
+session.mount("https://", _adapter)
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int
+    body: bytes
+    content_type: str
+    encoding: Optional[str]
+    truncated: bool = False
+
+
+@dataclass
+class _CacheEntry:
+    result: FetchResult
+    expires: float
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+_cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _parse_cache_control(value: str) -> dict:
+    directives = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"')
+    return directives
+
+
+def _store(url: str, resp: requests.Response, result: FetchResult):
+    directives = _parse_cache_control(resp.headers.get("Cache-Control", ""))
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    if "no-store" in directives or result.truncated:
+        return
+
+    try:
+        max_age = int(directives.get("max-age", 0))
+    except ValueError:
+        max_age = 0
+    if "no-cache" in directives:
+        max_age = 0
+    if max_age <= 0 and not etag and not last_modified:
+        return  # Nothing to reuse or revalidate
+
+    with _lock:
+        _cache[url] = _CacheEntry(result, time.monotonic() + max_age, etag, last_modified)
+        _cache.move_to_end(url)
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _charset_from_content_type(content_type: str) -> Optional[str]:
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "charset" and value:
+            return value.strip('"').lower()
+    return None
+
+
+def detect_encoding(body: bytes, content_type: str = "") -> str:
+    """
+    Detect the charset of a document: HTTP header, then BOM / <meta>, then content sniffing.
+    """
+    encoding = _charset_from_content_type(content_type)
+    if encoding:
+        return encoding
+    if body.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    match = META_CHARSET.search(body[:4096])
+    if match:
+        return match.group(1).decode("ascii").lower()
+    try:
+        body.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    from charset_normalizer import from_bytes
+    matches = from_bytes(body[:65536])
+    best = matches.best()
+    if best is None:
+        return "utf-8"
+    # Western pages look almost as plausible in other single-byte codepages (cp1257, cp1250...):
+    # prefer windows-1252, the fallback of browsers for undeclared pages, when it is a close match
+    for match in matches:
+        if match.encoding == "cp1252" and match.chaos <= best.chaos + CHAOS_TOLERANCE:
+            return "cp1252"
+    return best.encoding
+
+
+def decode_body(body: bytes, encoding: Optional[str]) -> str:
+    try:
+        return body.decode(encoding or "utf-8", errors="replace")
+    except LookupError:  # Unknown charset name
+        return body.decode("utf-8", errors="replace")
+
+
+def fetch(url: str, max_bytes: int = MAX_BYTES) -> FetchResult:
+    """
+    GET a URL through the shared connection pool, reading at most max_bytes.
+
+    Responses are cached following Cache-Control; stale entries are revalidated
+    with If-None-Match / If-Modified-Since so an unchanged page costs a 304.
+
+    Args:
+        url:       URL to fetch
+        max_bytes: Maximum number of bytes read from the body
+
+    Returns:
+        FetchResult with the raw body and its detected encoding.
+    """
+    with _lock:
+        entry = _cache.get(url)
+    if entry is not None and entry.expires > time.monotonic():
+        return entry.result
+
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    with session.get(url, headers=headers, timeout=TIMEOUT, stream=True) as resp:
+        if resp.status_code == 304 and entry is not None:
+            logger.debug(f"HTTP cache revalidated {url}")
+            _store(url, resp, entry.result)
+            return entry.result
+
+        chunks, size, truncated = [], 0, False
+        for chunk in resp.iter_content(CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                truncated = True
+                break
+        body = b"".join(chunks)[:max_bytes]
+
+        content_type = resp.headers.get("Content-Type", "")
+        result = FetchResult(
+            url=resp.url,
+            status=resp.status_code,
+            body=body,
+            content_type=content_type,
+            encoding=detect_encoding(body, content_type),
+            truncated=truncated,
+        )
+        if resp.status_code == 200:
+            _store(url, resp, result)
+    return result